@@ -1,15 +1,13 @@
 """Custom integration to integrate SmartHomeSec supported alarms with Home Assistant."""
 
 import asyncio
-import logging
-import requests
 import hashlib
+import logging
+import re
 import time
-from custom_components.smarthomesec.ws_client import WSClient
+from typing import Any
 import voluptuous as vol
-import async_timeout
 
-from functools import partial
 from datetime import timedelta
 
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
@@ -24,13 +22,46 @@ from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
-from homeassistant.core import DOMAIN as HOMEASSISTANT_DOMAIN, HomeAssistant
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    DOMAIN as HOMEASSISTANT_DOMAIN,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.service import async_register_admin_service
+from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers.issue_registry import IssueSeverity, async_create_issue
 from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN, API_BASEHOST, API_BASEPATH, TYPE_CLASS_BINARY_SENSOR, ALARM_AREAS
+from .api import (
+    SmarthomesecAuthError,
+    SmarthomesecRateLimitedError,
+    SmarthomesecRejectedError,
+    decode_json,
+)
+from .commands import AlarmCommandQueue
+from .manager import SmarthomesecAccount, SmarthomesecConnectionManager, async_get_manager
+from .governor import PRIORITY_COMMAND, PRIORITY_POLL, SmarthomesecCircuitOpenError
+from .refresh import RefreshScheduler
+from .timeline import KIND_AREA, KIND_DEVICE, EventTimeline
+from .model import build_snapshot
+from .delta import apply_delta, diff_snapshots, extract_delta
+from .const import (
+    DOMAIN,
+    POLL_INTERVAL,
+    POLL_INTERVAL_PUSH_HEALTHY,
+    POLL_INTERVAL_MAX_BACKOFF,
+    PUSH_HEALTH_CHECK_INTERVAL,
+    CONF_STALE_WINDOW,
+    STALE_WINDOW,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -47,9 +78,48 @@ CONFIG_SCHEMA = vol.Schema(
     extra=vol.ALLOW_EXTRA,
 )
 
+SERVICE_GET_TIMELINE = "get_timeline"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_DEVICE_ID = "device_id"
+ATTR_AREA = "area"
+ATTR_STATE = "state"
+ATTR_LIMIT = "limit"
+
+SERVICE_START_CAPTURE = "start_capture"
+SERVICE_STOP_CAPTURE = "stop_capture"
+ATTR_FILENAME = "filename"
+
+# Captures live in the config directory and can never be named like a file
+# Home Assistant or another integration owns
+CAPTURE_FILENAME = re.compile(r"smarthomesec_[A-Za-z0-9_-]+\.jsonl\.gz")
+
+
+def _capture_filename(value: Any) -> str:
+    """Accept a smarthomesec_*.jsonl.gz file name without a directory."""
+    value = cv.string(value)
+    if not CAPTURE_FILENAME.fullmatch(value):
+        raise vol.Invalid("filename must look like smarthomesec_<name>.jsonl.gz")
+    return value
+
+
+START_CAPTURE_SCHEMA = vol.Schema(
+    {vol.Optional(ATTR_FILENAME, default="smarthomesec_capture.jsonl.gz"): _capture_filename}
+)
+
+GET_TIMELINE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Exclusive(ATTR_DEVICE_ID, "target"): cv.string,
+        vol.Exclusive(ATTR_AREA, "target"): cv.string,
+        vol.Optional(ATTR_STATE): cv.string,
+        vol.Optional(ATTR_LIMIT, default=20): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
 PLATFORMS: list[Platform] = [
     Platform.BINARY_SENSOR,
     Platform.ALARM_CONTROL_PANEL,
+    Platform.SENSOR,
 ]
 
 
@@ -62,6 +132,53 @@ async def handle_async_init_result(hass: HomeAssistant, domain: str, conf: dict)
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the integration."""
 
+    async def async_get_timeline(call: ServiceCall) -> ServiceResponse:
+        """Return recent transitions without touching the recorder."""
+        kind = item_id = None
+        if ATTR_DEVICE_ID in call.data:
+            kind, item_id = KIND_DEVICE, call.data[ATTR_DEVICE_ID]
+        elif ATTR_AREA in call.data:
+            kind, item_id = KIND_AREA, call.data[ATTR_AREA]
+        state = call.data.get(ATTR_STATE)
+        # Devices record their on/off state, areas their mode
+        state = {"on": True, "off": False}.get(state, state)
+
+        entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+        entries = {}
+        for key, entry_data in hass.data.get(DOMAIN, {}).items():
+            if not isinstance(entry_data, dict) or "coordinator" not in entry_data:
+                continue
+            if entry_id is not None and key != entry_id:
+                continue
+            timeline = entry_data["coordinator"].timeline
+            entries[key] = [
+                event.as_dict()
+                for event in timeline.query(kind, item_id, state, limit=call.data[ATTR_LIMIT])
+            ]
+        return {"entries": entries}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_TIMELINE,
+        async_get_timeline,
+        schema=GET_TIMELINE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_start_capture(call: ServiceCall) -> None:
+        """Start recording traffic for the replayer."""
+        await async_get_manager(hass).async_start_capture(hass.config.path(call.data[ATTR_FILENAME]))
+
+    async def async_stop_capture(call: ServiceCall) -> None:
+        """Stop recording traffic."""
+        await async_get_manager(hass).async_stop_capture()
+
+    # Captures write to the config directory and hold panel data
+    async_register_admin_service(
+        hass, DOMAIN, SERVICE_START_CAPTURE, async_start_capture, schema=START_CAPTURE_SCHEMA
+    )
+    async_register_admin_service(hass, DOMAIN, SERVICE_STOP_CAPTURE, async_stop_capture)
+
     if DOMAIN not in config:
         return True
 
@@ -78,51 +195,145 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     username = entry.data[CONF_USERNAME]
     password = entry.data[CONF_PASSWORD]
 
+    manager = async_get_manager(hass)
+    account = manager.async_acquire(entry.entry_id, username, password)
+    coordinator = None
+
     try:
-        coordinator = SmarthomesecCoordinator(hass, username, password)
+        coordinator = SmarthomesecCoordinator(
+            hass,
+            username,
+            password,
+            account,
+            entry_id=entry.entry_id,
+            stale_window=entry.options.get(CONF_STALE_WINDOW, STALE_WINDOW),
+        )
+        await coordinator.timeline.async_load()
+        account.async_add_listener(entry.entry_id, coordinator.callback)
         await coordinator.async_config_entry_first_refresh()
 
-        partial_func = partial(coordinator.get_devices_by_type, TYPE_CLASS_BINARY_SENSOR)
-        binary_sensor_devices = await hass.async_add_executor_job(partial_func)
-        _LOGGER.info(binary_sensor_devices)
-
-        partial_func = partial(coordinator.get_alarms, ALARM_AREAS)
-        alarm_areas = await hass.async_add_executor_job(partial_func)
-        _LOGGER.info(alarm_areas)
-
+    except ConfigEntryAuthFailed:
+        # Let Home Assistant start the reauth flow
+        await _async_abort_setup(manager, entry, coordinator)
+        raise
     except Exception as ex:
         _LOGGER.error("Failed to connect to SmartHomeSec: " + str(ex))
+        await _async_abort_setup(manager, entry, coordinator)
         return False
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {}
+    # Platforms follow the inventory of the coordinator from here on
     hass.data.setdefault(DOMAIN, {})[entry.entry_id]["coordinator"] = coordinator
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id]["binary_sensor_devices"] = binary_sensor_devices
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id]["alarm_areas"] = alarm_areas
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # Entities exist and have their first state, connect push once HA has started
+    entry.async_on_unload(async_at_started(hass, coordinator.async_start_push))
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
+    return True
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply new options without a reload."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    coordinator.stale_window = entry.options.get(CONF_STALE_WINDOW, STALE_WINDOW)
+    coordinator.async_update_listeners()
+
+
+async def _async_abort_setup(
+    manager: SmarthomesecConnectionManager,
+    entry: ConfigEntry,
+    coordinator: "SmarthomesecCoordinator | None",
+) -> None:
+    """Free what a failed setup already started."""
+    if coordinator is not None:
+        await coordinator.async_shutdown()
+    await manager.async_release(entry.entry_id)
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload a config entry and everything it runs."""
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
+
+    coordinator = hass.data[DOMAIN].pop(entry.entry_id)["coordinator"]
+    await coordinator.async_shutdown()
+    await async_get_manager(hass).async_release(entry.entry_id)
     return True
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete what a removed config entry kept on disk."""
+    manager = async_get_manager(hass)
+    await EventTimeline(hass, entry.entry_id).async_remove()
+    username = entry.data[CONF_USERNAME]
+    if not manager.is_in_use(username):
+        await manager.auth_store.async_remove(username)
+    await manager.async_close_api()
+
+
 class SmarthomesecCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass, username, password):
+    def __init__(
+        self,
+        hass,
+        username,
+        password,
+        account: SmarthomesecAccount,
+        entry_id: str | None = None,
+        stale_window: float = STALE_WINDOW,
+    ):
         super().__init__(
             hass,
             _LOGGER,
             # Name of the data. For logging purposes.
             name="Smarthomesec",
             # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(seconds=30),
+            update_interval=timedelta(seconds=POLL_INTERVAL),
+            # Unchanged snapshots do not fan out to the entities
+            always_update=False,
         )
 
         """Initialize object."""
         self.hass = hass
         self.username = username
         self.password = password
-        self.token = None
-        self.userid = None
-        self.status = None
-        self.wsc = None
+        # HTTP pool, push socket and request budget are shared per account
+        self.account = account
+        self.api = account.api
+        self.refresh_scheduler = RefreshScheduler(hass, self.async_refresh)
+        self._refresh_lock = asyncio.Lock()
+        self.commands = AlarmCommandQueue(
+            hass, self.set_alarm_mode, self.refresh_scheduler.async_schedule, lambda: self.data
+        )
+        self.consecutive_failures = 0
+        # Device and area ids that differ from the previous snapshot
+        self.changed_devices: set[str] = set()
+        self.changed_alarms: set[str] = set()
+        # Devices or areas appeared or vanished with the last snapshot
+        self.inventory_changed = False
+        self.skipped_writes = 0
+        # Set once setup asked for the push channel
+        self._push_requested = False
+        self._push_start_task: asyncio.Task | None = None
+        # Entities serve their last state for this long while refreshes fail
+        self.stale_window = stale_window
+        # Wall time of the last good panel/cycle, and of push updates since
+        self.last_good: float | None = None
+        self._device_updated: dict[str, float] = {}
+        self._area_updated: dict[str, float] = {}
+        # Recent transitions, persisted when bound to a config entry
+        self.timeline = EventTimeline(hass, entry_id)
+        # Fingerprint of the last decoded panel/cycle body
+        self._fingerprint = None
+        self.fingerprint_stats = {"hits": 0, "misses": 0}
+        # Bumped by every applied push delta, a panel/cycle requested
+        # before the bump may hold older state than the snapshot
+        self._generation = 0
+        self.discarded_refreshes = 0
+        self._unsub_health_check: CALLBACK_TYPE | None = async_track_time_interval(
+            hass, self._async_check_push_health, timedelta(seconds=PUSH_HEALTH_CHECK_INTERVAL)
+        )
 
     async def _async_update_data(self):
         """Fetch data from API endpoint.
@@ -130,177 +341,282 @@ class SmarthomesecCoordinator(DataUpdateCoordinator):
         This is the place to pre-process the data to lookup tables
         so entities can quickly look up their data.
         """
+        # Interval polls, the first refresh and scheduled refreshes all land
+        # here, only one of them may fetch and diff at a time
+        async with self._refresh_lock:
+            return await self._async_fetch_snapshot()
+
+    async def _async_fetch_snapshot(self):
+        self.changed_devices = set()
+        self.changed_alarms = set()
+        self.inventory_changed = False
+        generation = self._generation
+        start = time.monotonic()
         try:
             # Note: asyncio.TimeoutError and aiohttp.ClientError are already
             # handled by the data update coordinator.
-            ret = {}
-            ret["devices"] = {}
-            ret["alarms"] = {}
-            async with async_timeout.timeout(10):
-                status = await self.hass.async_add_executor_job(self.update_status)
-                for device in status["device_status"]:
-                    device_id = device["device_id"]
-                    ret["devices"][device_id] = device
-                for alarm in status["model"]:
-                    area_id = alarm["area"]
-                    ret["alarms"][str(area_id)] = alarm
-                return ret
-
+            async with asyncio.timeout(10):
+                status = await self.update_status()
+                if status is None:
+                    ret = self.data
+                else:
+                    ret = build_snapshot(status)
+
+        except SmarthomesecAuthError as err:
+            self.account.metrics.refresh.record(time.monotonic() - start)
+            raise ConfigEntryAuthFailed(f"Credentials rejected: {err}") from err
         except Exception as err:
+            self.account.metrics.refresh.record(time.monotonic() - start)
+            self.consecutive_failures += 1
+            self.async_adjust_interval()
+            if self.consecutive_failures == 1 and self.data is not None:
+                # Entities keep the last snapshot, revalidate right away
+                # instead of waiting a whole interval
+                self.refresh_scheduler.async_schedule()
             raise UpdateFailed(f"Error communicating with API: {str(err)}")
 
-    def login(self):
-
-        res = None
+        self.account.metrics.refresh.record(time.monotonic() - start)
+        self.consecutive_failures = 0
+        if self._push_requested and self.wsc is None and self.token is not None:
+            self.account.async_start_push(self.token)
+        if self._generation != generation:
+            _LOGGER.debug("Push event applied during the refresh, fetching again")
+            self.discarded_refreshes += 1
+            self._fingerprint = None
+            self.refresh_scheduler.async_schedule()
+            self.async_adjust_interval()
+            return self.data
+        # Every device and area was just confirmed by the cloud
+        self.last_good = time.time()
+        self._device_updated.clear()
+        self._area_updated.clear()
+        self.async_adjust_interval()
+        if ret is not self.data:
+            self.changed_devices, self.changed_alarms = diff_snapshots(self.data, ret)
+            self.inventory_changed = (
+                self.data is None
+                or self.data["devices"].keys() != ret["devices"].keys()
+                or self.data["alarms"].keys() != ret["alarms"].keys()
+            )
+            self.timeline.async_record(self.data, ret, self.changed_devices, self.changed_alarms)
+        return ret
+
+    def device_updated(self, device_id: str) -> float | None:
+        """Return when the data of a device was last confirmed."""
+        return self._device_updated.get(device_id, self.last_good)
+
+    def area_updated(self, area: str) -> float | None:
+        """Return when the data of an alarm area was last confirmed."""
+        return self._area_updated.get(area, self.last_good)
+
+    def is_fresh(self, updated: float | None) -> bool:
+        """Return True if data confirmed at updated may still be served."""
+        if self.data is None or updated is None:
+            return False
+        # A live push channel would have told us about any change
+        return self.push_healthy or time.time() - updated < self.stale_window
+
+    @property
+    def wsc(self):
+        """Return the push client of the account."""
+        return self.account.wsc
+
+    @callback
+    def async_start_push(self, _hass=None) -> None:
+        """Start the push channel of the account in the background."""
+        self._push_requested = True
+        if self.token is not None:
+            self.account.async_start_push(self.token)
+        elif self._push_start_task is None:
+            # No REST call has loaded the session yet
+            self._push_start_task = self.hass.async_create_background_task(
+                self._async_start_push_with_session(), "smarthomesec push start"
+            )
+
+    async def _async_start_push_with_session(self) -> None:
         try:
-            payload = {
-                "account": self.username,
-                "password": hashlib.md5(self.password.encode('utf-8')).hexdigest(),
-                "pw_encrypted": "hashed",
-                "login_entry": "web"
-            }
-            headers = {
-                "cookie": "isPrivacy=1;",
-                "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-            }
-
-            res = requests.post(f'https://{API_BASEHOST}/{API_BASEPATH}/auth/login', data=payload, headers=headers)
-
-            if res.status_code != 200:
-                raise Exception(f"Status: {res.status_code}")
-        except Exception as ex:
-            raise Exception("Failed to connect to SmartHomeSec: " + str(ex))
-
+            token, _user_id = await self.account.auth.async_get_session()
+        except Exception as ex:  # pylint: disable=broad-except
+            # The next successful refresh starts it instead
+            _LOGGER.warning("Cannot start push without a session: %s", ex)
+            return
+        finally:
+            self._push_start_task = None
+        self.account.async_start_push(token)
+
+    @property
+    def push_healthy(self) -> bool:
+        """Return True if the push channel is connected and not stale."""
+        if self.wsc is None or self.wsc.wsc is None or self.wsc.last_seen is None:
+            return False
+        silence = self.hass.loop.time() - self.wsc.last_seen
+        return silence < self.wsc.ping_interval + self.wsc.ping_timeout
+
+    @callback
+    def async_adjust_interval(self) -> None:
+        """Pick the polling interval from push health and recent failures."""
+        seconds = POLL_INTERVAL_PUSH_HEALTHY if self.push_healthy else POLL_INTERVAL
+        if self.consecutive_failures > 1:
+            # Repeated errors only ever slow polling down
+            seconds = max(
+                seconds,
+                min(POLL_INTERVAL * 2 ** (self.consecutive_failures - 1), POLL_INTERVAL_MAX_BACKOFF),
+            )
+
+        interval = timedelta(seconds=seconds)
+        if interval != self.update_interval:
+            _LOGGER.debug("Polling interval changed to %s", interval)
+            self.update_interval = interval
+
+    @callback
+    def _async_check_push_health(self, _now=None) -> None:
+        """Tighten polling as soon as the push channel goes quiet."""
+        if self.update_interval == timedelta(seconds=POLL_INTERVAL_PUSH_HEALTHY) and not self.push_healthy:
+            _LOGGER.debug("Push channel stale, reconciling")
+            self.async_adjust_interval()
+            self.refresh_scheduler.async_schedule()
+        if not self.last_update_success and not self.is_fresh(self.last_good):
+            # Failed refreshes do not notify, let entities whose data got
+            # too old go unavailable; the others skip the write
+            self.async_update_listeners()
+
+    async def async_shutdown(self) -> None:
+        """Cancel timers and commands owned by the coordinator, safe to call twice."""
+        await super().async_shutdown()
+        if self._unsub_health_check is not None:
+            self._unsub_health_check()
+            self._unsub_health_check = None
+        self.refresh_scheduler.async_cancel()
+        self.commands.async_cancel()
+        if self._push_start_task is not None:
+            self._push_start_task.cancel()
+            self._push_start_task = None
+        await self.timeline.async_save()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Confirm pending alarm commands before entities read the snapshot."""
+        self.commands.async_confirm(self.data)
+        super().async_update_listeners()
+
+    @property
+    def token(self):
+        """Return the current account token."""
+        return self.account.auth.token
+
+    @property
+    def userid(self):
+        """Return the current account user id."""
+        return self.account.auth.user_id
+
+    async def login(self):
         try:
-            json_dict = res.json()
-            self.token = json_dict["token"]
-            self.userid = json_dict["data"]["user_id"]
-
-            _LOGGER.debug(self.token)
-            if self.wsc is None:
-                self.wsc = WSClient(self, self.token)
-                self.wsc.start()
-            
+            await self.account.auth.async_login()
         except Exception as ex:
             raise Exception("Failed to connect to SmartHomeSec: " + str(ex))
-        
+
         _LOGGER.debug("Logged in")
 
-    def _rest_call_get(self, path):
-        res = None
+    async def _rest_call(self, method, path, payload=None, raw=False):
         status_code = 0
+        body = None
         loop = 0
 
-        if not self.token:
-            self.login()
-
-        while status_code != 200 and loop < 2:
+        while loop < 2:
             try:
-                headers = {
-                    "cookie": f"isPrivacy=1; api_token={self.token}; id={self.userid}; cookiePath=%2FByDemes%2F0%2F0%2F",
-                    "token": f"{self.token}",
-                }
-                params = {
-                    "_": round(time.time() * 1000),
-                }
-                res = requests.get(f'https://{API_BASEHOST}/{API_BASEPATH}/{path}', params=params, headers=headers)
-
-
+                token, userid = await self.account.auth.async_get_session()
+                # Commands jump ahead of background polling
+                status_code, body = await self.account.governor.async_request(
+                    PRIORITY_COMMAND if method == "POST" else PRIORITY_POLL,
+                    lambda: self.api.async_request(
+                        method, path, token, userid, payload, raw, self.account.metrics
+                    ),
+                )
+            except (
+                SmarthomesecAuthError,
+                SmarthomesecCircuitOpenError,
+                SmarthomesecRateLimitedError,
+            ):
+                raise
             except Exception as ex:
                 raise Exception("Failed to connect to SmartHomeSec: " + str(ex))
 
-            status_code = res.status_code
+            if status_code != 401:
+                break
+
             try:
-                if status_code == 401:
-                    self.login()
-                    loop += 1
-                    
+                # Parallel callers share a single re-login
+                await self.account.auth.async_login(stale_token=token)
+                loop += 1
+            except (
+                SmarthomesecAuthError,
+                SmarthomesecCircuitOpenError,
+                SmarthomesecRateLimitedError,
+            ):
+                raise
             except Exception as ex:
                 raise Exception("Security error: " + str(ex))
 
-        if status_code != 200:
-            raise Exception(f"Status: {res.status_code} / {self.token} / {self.userid}")
-
-        try:
-            json_dict = res.json()
-            # _LOGGER.debug(json_dict)
-
-            return json_dict
-        except Exception as ex:
-            raise Exception("Failed to connect to do a GET on SmartHomeSec: " + str(ex))
+        return status_code, body
 
-    def _rest_call_post(self, path, payload):
-        res = None
-        status_code = 0
-        loop = 0
-
-        _LOGGER.info(f"set_alarm_mode: {payload}")
+    async def _rest_call_get(self, path, raw=False):
+        status_code, body = await self._rest_call("GET", path, raw=raw)
 
-        if not self.token:
-            self.login()
-
-        while status_code != 200 and loop < 2:
-            try:
-                headers = {
-                    "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-                    "cookie": f"isPrivacy=1; api_token={self.token}; id={self.userid}; cookiePath=%2FByDemes%2F0%2F0%2F",
-                    "token": f"{self.token}",
-                }
-                params = {
-                    "_": round(time.time() * 1000),
-                }
-                res = requests.post(f'https://{API_BASEHOST}/{API_BASEPATH}/{path}', params=params, headers=headers, data=payload)
+        if status_code != 200:
+            raise Exception(f"Status: {status_code} / {self.userid}")
 
-                _LOGGER.info(res)
+        if not body:
+            raise Exception("Failed to connect to do a GET on SmartHomeSec: empty response")
 
+        # _LOGGER.debug(body)
+        return body
 
-            except Exception as ex:
-                raise Exception("Failed to connect to SmartHomeSec: " + str(ex))
+    async def _rest_call_post(self, path, payload):
+        _LOGGER.info(f"set_alarm_mode: {payload}")
 
-            status_code = res.status_code
-            try:
-                if status_code == 401:
-                    self.login()
-                    loop += 1
-                    continue
-                elif status_code == 400:
-                    raise Exception("Security error")
-            except Exception as ex:
-                raise Exception("Security error: " + str(ex))
+        status_code, body = await self._rest_call("POST", path, payload)
 
-            if status_code != 200:
-                _LOGGER.error(f"Status: {res.status_code} / {self.token} / {self.userid} / {res.json()}")
-                raise Exception(f"Status: {res.status_code} / {self.token} / {self.userid}")
+        if status_code == 400:
+            raise SmarthomesecRejectedError("Security error: Security error")
 
-        try:
-            json_dict = res.json()
-            _LOGGER.info(json_dict)
-            return json_dict
-        except Exception as ex:
-            raise Exception("Failed to connect to do a GET on SmartHomeSec: " + str(ex))
-
-    def update_status(self):
-        self.status = self._rest_call_get("panel/cycle")
+        if status_code != 200:
+            _LOGGER.error(f"Status: {status_code} / {self.userid} / {body}")
+            raise Exception(f"Status: {status_code} / {self.userid}")
+
+        if body is None:
+            raise Exception("Failed to connect to do a POST on SmartHomeSec: empty response")
+
+        _LOGGER.info(body)
+        return body
+
+    async def update_status(self):
+        """Fetch panel/cycle, returning None if it is unchanged since the last snapshot."""
+        content = self.account.async_pop_initial_cycle()
+        if content is None:
+            content = await self._rest_call_get("panel/cycle", raw=True)
+        fingerprint = hashlib.blake2b(content, digest_size=16).digest()
+        if fingerprint == self._fingerprint and self.data is not None:
+            self.fingerprint_stats["hits"] += 1
+            return None
+
+        self.fingerprint_stats["misses"] += 1
         _LOGGER.debug("Retrieveing devices status")
-        return self.status["data"]
+        status = decode_json(content)
+        if status is None:
+            raise Exception("Failed to decode panel/cycle response")
+        self._fingerprint = fingerprint
+        return status["data"]
     
     def get_devices_by_type(self, types):
-        devices = []
-        for device in self.status["data"]["device_status"]:
-            if device["type"] in types:
-                devices.append(device)
-        
-        return devices
+        devices = self.data["devices"]
+        by_type = self.data["by_type"]
+        return [devices[device_id] for device_type in types for device_id in by_type.get(device_type, ())]
 
     def get_alarms(self, areas):
-        alarms = []
-        for alarm in self.status["data"]["model"]:
-            if alarm["area"] in areas:
-                alarms.append(alarm)
-        
-        return alarms
-
-    def set_alarm_mode(self, area, mode, pin):
+        alarms = self.data["alarms"]
+        return [alarms[str(area)] for area in areas if str(area) in alarms]
+
+    async def set_alarm_mode(self, area, mode, pin):
         payload = {
             "area": int(area),
             "pincode": int(pin),
@@ -308,20 +624,69 @@ class SmarthomesecCoordinator(DataUpdateCoordinator):
             "format": 1
         }
         _LOGGER.info("set_alarm_mode")
-        self._rest_call_post("panel/mode", payload)
+        await self._rest_call_post("panel/mode", payload)
 
     def callback(self, message, data):
 
         ''' Callback function should received message, data
             message: string
-            data: json dictionary
+            data: decoded PushEvent for "42", raw payload otherwise
+
+            Called on the event loop by the push client.
         '''
         if message == "WebSocketDisconnect":
-            self.wsc.stop_client()
-            self.wsc = None
+            # The push client reconnects on its own, poll meanwhile
+            self._async_check_push_health()
+        elif message == "WebSocketError":
+            self._async_check_push_health()
+        elif message == "0":
+            # Handshake received, the push channel is live
+            self.async_adjust_interval()
+            if self.wsc is not None and self.wsc.connections > 1:
+                # Events may have been missed while disconnected
+                self.refresh_scheduler.async_schedule()
         elif message == "3":
             pass
         elif message == "42":
             _LOGGER.info("Callback : %s / %s", message, data)
-            asyncio.run_coroutine_threadsafe(self.async_request_refresh(), self.hass.loop)
+            if not self.apply_push_event(data):
+                self.refresh_scheduler.async_schedule()
+
+    def apply_push_event(self, event):
+        """Patch the current snapshot with a push event.
+
+        Returns False when the event could not be applied and a full
+        panel/cycle refresh is needed instead.
+        """
+        if event is None or self.data is None:
+            return False
+
+        delta = extract_delta(event.data)
+        if delta is None:
+            _LOGGER.debug("Cannot decode event %s, refreshing", event.name)
+            return False
+
+        data = apply_delta(self.data, *delta)
+        if data is None:
+            _LOGGER.debug("Event %s references unknown devices, refreshing", event.name)
+            return False
+
+        self.changed_devices, self.changed_alarms = diff_snapshots(self.data, data)
+        # Deltas only touch known devices and areas
+        self.inventory_changed = False
+        now = time.time()
+        devices, alarms = delta
+        for device in devices:
+            self._device_updated[device["device_id"]] = now
+        for alarm in alarms:
+            self._area_updated[str(alarm["area"])] = now
+        self.timeline.async_record(self.data, data, self.changed_devices, self.changed_alarms)
+        # The snapshot no longer matches the last panel/cycle body
+        self._fingerprint = None
+        self._generation += 1
+        # Not async_set_updated_data, which would push the reconciliation
+        # poll back on every event of a busy device
+        self.data = data
+        self.async_update_listeners()
+        return True
     
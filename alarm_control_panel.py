@@ -3,8 +3,10 @@
 from __future__ import annotations
 
 import logging
+from typing import Any
 
 from homeassistant.components.alarm_control_panel import (
+    DOMAIN as ALARM_CONTROL_PANEL_DOMAIN,
     AlarmControlPanelEntity,
     AlarmControlPanelEntityFeature,
     AlarmControlPanelState,
@@ -21,12 +23,16 @@ from homeassistant.helpers.update_coordinator import (
 )
 
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.core import callback
 
-from .const import DOMAIN
+from .const import DOMAIN, ALARM_AREAS
 from . import SmarthomesecCoordinator
+from .base_entity import data_updated_attributes
+from .discovery import async_track_inventory
+from .model import AreaState
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,10 +43,15 @@ async def async_setup_entry(
 ) -> None:
     """Set up an alarm control panel for a Smarthomesec device."""
     coord = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
-    alarm_areas = hass.data[DOMAIN][config_entry.entry_id]["alarm_areas"]
 
-    async_add_entities(
-        SmarthomesecAlarm(coord, area, config_entry) for area in alarm_areas
+    async_track_inventory(
+        coord,
+        config_entry,
+        ALARM_CONTROL_PANEL_DOMAIN,
+        async_add_entities,
+        lambda: {alarm.area: alarm for alarm in coord.get_alarms(ALARM_AREAS)},
+        lambda alarm: SmarthomesecAlarm(coord, alarm, config_entry),
+        unique_id=lambda area: f'smarthomesec_{config_entry.data[CONF_NAME]}_{area}',
     )
 
 class SmarthomesecAlarm(CoordinatorEntity, AlarmControlPanelEntity):
@@ -55,12 +66,13 @@ class SmarthomesecAlarm(CoordinatorEntity, AlarmControlPanelEntity):
     )
 
     def __init__(
-        self, coord: SmarthomesecCoordinator, alarm, entry
+        self, coord: SmarthomesecCoordinator, alarm: AreaState, entry
     ) -> None:
         """Initialize the SmarthomesecAlarm class."""
         self._alarm = alarm
         self.coord = coord
-        self.area = str(alarm["area"])
+        self.area = alarm.area
+        self._written_available = None
 
         self._attr_name = f'{entry.data[CONF_NAME]} {self.area}'
         self._attr_unique_id = f'smarthomesec_{entry.data[CONF_NAME]}_{self.area}'
@@ -75,34 +87,64 @@ class SmarthomesecAlarm(CoordinatorEntity, AlarmControlPanelEntity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self._alarm = self.coordinator.data["alarms"][self.area]
+        if (
+            self.area not in self.coordinator.changed_alarms
+            and self._written_available == self.available
+        ):
+            self.coordinator.skipped_writes += 1
+            return
+        alarm = self.coordinator.data["alarms"].get(self.area)
+        if alarm is None:
+            # Gone from the panel, the platform removes the entity
+            return
+        self._alarm = alarm
+        self._written_available = self.available
         self.async_write_ha_state()
 
+    @property
+    def available(self) -> bool:
+        """Return True while the area data is recent enough, even if the last refresh failed."""
+        return self.coord.is_fresh(self.coord.area_updated(self.area))
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return when the cloud last confirmed the data, as of the last state write."""
+        return data_updated_attributes(self.coord.area_updated(self.area))
+
+    async def async_added_to_hass(self) -> None:
+        """Follow optimistic state changes of pending commands."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coord.commands.async_add_listener(self.area, self.async_write_ha_state)
+        )
+
     @property
     def alarm_state(self) -> AlarmControlPanelState | None:
         """Return the state of the device."""
-        if self._alarm["mode"] == "disarm":
-            return AlarmControlPanelState.DISARMED
-        elif self._alarm["mode"] == "arm":
-            return AlarmControlPanelState.ARMED_AWAY
-        elif self._alarm["mode"] == "home":
-            return AlarmControlPanelState.ARMED_HOME
-        elif self._alarm["mode"] == "triggered":
-            return AlarmControlPanelState.TRIGGERED
-        else:
-            return None
-
-    def alarm_arm_away(self, code: str | None = None) -> None:
+        pending = self.coord.commands.pending_mode(self.area)
+        if pending is not None and pending != self._alarm.mode:
+            if pending == "disarm":
+                return AlarmControlPanelState.DISARMING
+            return AlarmControlPanelState.ARMING
+        return self._alarm.alarm_state
+
+    async def _async_send_mode(self, mode: str, code: str | None) -> None:
+        try:
+            await self.coord.commands.async_submit(self.area, mode, code)
+        except Exception as ex:
+            raise HomeAssistantError(f"Failed to set alarm mode {mode}: {ex}") from ex
+
+    async def async_alarm_arm_away(self, code: str | None = None) -> None:
         """Send arm away command."""
         _LOGGER.info("alarm_arm_away")
-        self.coord.set_alarm_mode(self.area, "arm", code)
+        await self._async_send_mode("arm", code)
 
-    def alarm_disarm(self, code: str | None = None) -> None:
+    async def async_alarm_disarm(self, code: str | None = None) -> None:
         """Send disarm command."""
         _LOGGER.info("alarm_disarm")
-        self.coord.set_alarm_mode(self.area, "disarm", code)
+        await self._async_send_mode("disarm", code)
 
-    def alarm_arm_home(self, code: str | None = None) -> None:
+    async def async_alarm_arm_home(self, code: str | None = None) -> None:
         """Send arm home command."""
         _LOGGER.info("alarm_arm_home")
-        self.coord.set_alarm_mode(self.area, "home", code)
+        await self._async_send_mode("home", code)
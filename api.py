@@ -0,0 +1,180 @@
+"""Async REST transport for the SmartHomeSec cloud API."""
+
+import hashlib
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+try:
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as json_loads
+
+from .const import API_BASEHOST, API_BASEPATH, API_TIMEOUT
+from .metrics import SmarthomesecMetrics
+
+if TYPE_CHECKING:
+    from .capture import TrafficRecorder
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SmarthomesecApiError(Exception):
+    """Error to indicate a failed call to the SmartHomeSec cloud."""
+
+
+class SmarthomesecRejectedError(SmarthomesecApiError):
+    """Error to indicate the cloud refused a command."""
+
+
+class SmarthomesecAuthError(SmarthomesecApiError):
+    """Error to indicate the cloud refused the credentials."""
+
+
+class SmarthomesecRateLimitedError(SmarthomesecApiError):
+    """Error to indicate the cloud answered 429 Too Many Requests."""
+
+    def __init__(self, retry_after: float | None) -> None:
+        """Initialize the error with the Retry-After delay, if any."""
+        super().__init__(f"Rate limited, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _retry_after(res: aiohttp.ClientResponse) -> float | None:
+    try:
+        return max(float(res.headers["Retry-After"]), 0.0)
+    except (KeyError, ValueError):
+        # Missing, or an HTTP date
+        return None
+
+
+class SmarthomesecApi:
+    """Thin asyncio wrapper around the SmartHomeSec REST endpoints.
+
+    All calls go through a single aiohttp session so TLS connections are
+    kept alive and reused between polls and commands.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        base_url: str | None = None,
+        ws_url: str | None = None,
+    ) -> None:
+        """Initialize the transport."""
+        self.session = session
+        # Set while a traffic capture is running
+        self.recorder: TrafficRecorder | None = None
+        self.base_url = base_url or f"https://{API_BASEHOST}/{API_BASEPATH}"
+        self.ws_url = ws_url or f"wss://{API_BASEHOST}/ws/socket.io/"
+        self._timeout = aiohttp.ClientTimeout(total=API_TIMEOUT)
+
+    @staticmethod
+    def _auth_headers(token: str | None, userid: str | None) -> dict[str, str]:
+        return {
+            "cookie": f"isPrivacy=1; api_token={token}; id={userid}; cookiePath=%2FByDemes%2F0%2F0%2F",
+            "token": f"{token}",
+            "accept-encoding": "gzip, deflate",
+        }
+
+    async def async_login(
+        self, username: str, password: str, metrics: SmarthomesecMetrics | None = None
+    ) -> dict[str, Any]:
+        """Log in and return the decoded auth/login response."""
+        payload = {
+            "account": username,
+            "password": hashlib.md5(password.encode('utf-8')).hexdigest(),
+            "pw_encrypted": "hashed",
+            "login_entry": "web"
+        }
+        headers = {
+            "cookie": "isPrivacy=1;",
+            "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
+            "accept-encoding": "gzip, deflate",
+        }
+
+        start = time.monotonic()
+        try:
+            async with self.session.post(
+                f"{self.base_url}/auth/login", data=payload, headers=headers, timeout=self._timeout
+            ) as res:
+                content = await res.read()
+        except (aiohttp.ClientError, TimeoutError) as ex:
+            _record(metrics, "auth/login", start, None)
+            raise SmarthomesecApiError(f"Failed to connect to SmartHomeSec: {ex!r}") from ex
+
+        _record(metrics, "auth/login", start, res.status)
+        if res.status == 429:
+            raise SmarthomesecRateLimitedError(_retry_after(res))
+        if res.status in (400, 401, 403):
+            raise SmarthomesecAuthError(f"Status: {res.status}")
+        if res.status != 200:
+            raise SmarthomesecApiError(f"Status: {res.status}")
+        return decode_json(content)
+
+    async def async_request(
+        self,
+        method: str,
+        path: str,
+        token: str | None,
+        userid: str | None,
+        payload: dict[str, Any] | None = None,
+        raw: bool = False,
+        metrics: SmarthomesecMetrics | None = None,
+    ) -> tuple[int, Any]:
+        """Perform an authenticated call and return its status and decoded body.
+
+        With raw set the undecoded response bytes are returned instead. The
+        call is timed into metrics, those of the calling account.
+        """
+        headers = self._auth_headers(token, userid)
+        params = {
+            "_": round(time.time() * 1000),
+        }
+        data = None
+        if payload is not None:
+            headers["content-type"] = "application/x-www-form-urlencoded; charset=UTF-8"
+            data = {key: str(value) for key, value in payload.items()}
+
+        start = time.monotonic()
+        try:
+            async with self.session.request(
+                method,
+                f"{self.base_url}/{path}",
+                params=params,
+                headers=headers,
+                data=data,
+                timeout=self._timeout,
+            ) as res:
+                content = await res.read()
+        except (aiohttp.ClientError, TimeoutError) as ex:
+            _record(metrics, path, start, None)
+            raise SmarthomesecApiError(f"Failed to connect to SmartHomeSec: {ex!r}") from ex
+
+        _record(metrics, path, start, res.status)
+        if self.recorder is not None:
+            self.recorder.record_rest(method, path, res.status, content)
+        if res.status == 429:
+            raise SmarthomesecRateLimitedError(_retry_after(res))
+        if raw:
+            return res.status, content
+        return res.status, decode_json(content)
+
+
+def _record(
+    metrics: SmarthomesecMetrics | None, endpoint: str, start: float, status: int | None
+) -> None:
+    if metrics is not None:
+        metrics.record_rest(endpoint, time.monotonic() - start, status)
+
+
+def decode_json(content: bytes) -> Any:
+    """Decode a response body, None if it is not JSON."""
+    if not content:
+        return None
+    try:
+        return json_loads(content)
+    except ValueError:
+        return None
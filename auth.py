@@ -0,0 +1,184 @@
+"""Single-flight authentication for a SmartHomeSec account."""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api import (
+    SmarthomesecApi,
+    SmarthomesecApiError,
+    SmarthomesecAuthError,
+    SmarthomesecRateLimitedError,
+)
+from .const import TOKEN_REFRESH_AGE
+from .governor import PRIORITY_COMMAND, RequestGovernor, SmarthomesecCircuitOpenError
+from .metrics import SmarthomesecMetrics
+from .storage import SmarthomesecAuthStore
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_governed_login(
+    api: SmarthomesecApi,
+    governor: RequestGovernor,
+    username: str,
+    password: str,
+    metrics: SmarthomesecMetrics | None = None,
+) -> dict[str, Any]:
+    """Call auth/login under the request budget of the account.
+
+    Logins go ahead of polls since every other call waits for the token.
+    """
+
+    async def _request() -> tuple[int, Any]:
+        return 200, await api.async_login(username, password, metrics)
+
+    _status, session = await governor.async_request(PRIORITY_COMMAND, _request)
+    return session
+
+
+class SmarthomesecAuth:
+    """Own the token of an account.
+
+    Concurrent callers that need a new token wait on the same login, and
+    tokens older than TOKEN_REFRESH_AGE are renewed in the background while
+    the current one keeps being used.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: SmarthomesecApi,
+        store: SmarthomesecAuthStore,
+        username: str,
+        password: str,
+        governor: RequestGovernor,
+        metrics: SmarthomesecMetrics | None = None,
+    ) -> None:
+        """Initialize the auth manager."""
+        self.hass = hass
+        self.api = api
+        self.store = store
+        self.username = username
+        self.password = password
+        self.governor = governor
+        self.metrics = metrics
+
+        self.token: str | None = None
+        self.user_id: str | None = None
+        self.issued: float | None = None
+
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._refresh_task: asyncio.Task | None = None
+
+        self.stats: dict[str, Any] = {
+            "logins": 0,
+            "login_failures": 0,
+            "proactive_refreshes": 0,
+            "last_login_latency": None,
+            "total_login_latency": 0.0,
+        }
+
+    @property
+    def token_age(self) -> float | None:
+        """Return the age of the current token in seconds."""
+        if self.issued is None:
+            return None
+        return time.time() - self.issued
+
+    async def async_get_session(self) -> tuple[str, str]:
+        """Return a token and user id, logging in only if there is none."""
+        if not self._loaded:
+            async with self._lock:
+                if not self._loaded:
+                    self._loaded = True
+                    # Reuse the last session, a 401 falls back to a full login
+                    if session := await self.store.async_get(self.username):
+                        self.token = session["token"]
+                        self.user_id = session["user_id"]
+                        self.issued = session.get("issued")
+
+        if self.token is None:
+            await self.async_login()
+        elif (age := self.token_age) is not None and age > TOKEN_REFRESH_AGE:
+            self._async_schedule_refresh()
+
+        return self.token, self.user_id
+
+    @callback
+    def async_set_session(self, token: str, user_id: str) -> None:
+        """Use a session obtained outside of this manager, such as by the config flow."""
+        self._loaded = True
+        self.token = token
+        self.user_id = user_id
+        self.issued = time.time()
+
+    async def async_login(self, stale_token: str | None = None) -> None:
+        """Log in, or wait for a login already in progress.
+
+        With stale_token set the login is skipped if another caller has
+        already replaced that token.
+        """
+        async with self._lock:
+            if stale_token is not None and self.token != stale_token:
+                return
+            await self._async_do_login()
+
+    async def _async_do_login(self) -> None:
+        start = time.monotonic()
+        try:
+            json_dict = await async_governed_login(
+                self.api, self.governor, self.username, self.password, self.metrics
+            )
+            token = json_dict["token"]
+            user_id = json_dict["data"]["user_id"]
+        except (
+            SmarthomesecAuthError,
+            SmarthomesecCircuitOpenError,
+            SmarthomesecRateLimitedError,
+        ):
+            # Callers tell these apart, keep them as they are
+            self.stats["login_failures"] += 1
+            raise
+        except (SmarthomesecApiError, KeyError, TypeError) as ex:
+            self.stats["login_failures"] += 1
+            raise SmarthomesecApiError(f"Login failed: {ex}") from ex
+
+        latency = time.monotonic() - start
+        self.stats["logins"] += 1
+        self.stats["last_login_latency"] = round(latency, 3)
+        self.stats["total_login_latency"] += latency
+
+        self.token = token
+        self.user_id = user_id
+        self.issued = time.time()
+        await self.store.async_set(self.username, token, user_id)
+        _LOGGER.debug("Logged in as %s in %.3fs", self.username, latency)
+
+    @callback
+    def _async_schedule_refresh(self) -> None:
+        if self._refresh_task is not None or self._lock.locked():
+            return
+        self.stats["proactive_refreshes"] += 1
+        self._refresh_task = self.hass.async_create_background_task(
+            self._async_refresh(), "smarthomesec token refresh"
+        )
+
+    async def _async_refresh(self) -> None:
+        try:
+            await self.async_login(stale_token=self.token)
+        except SmarthomesecApiError as ex:
+            _LOGGER.warning("Proactive token refresh failed: %s", ex)
+        finally:
+            self._refresh_task = None
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel a pending background refresh."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
@@ -1,6 +1,8 @@
 """Provides the Smarthomesec entity for Home Assistant."""
 
+from datetime import datetime
 import logging
+from typing import Any
 
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import (
@@ -9,9 +11,11 @@ from homeassistant.helpers.update_coordinator import (
     UpdateFailed,
 )
 from homeassistant.core import callback
+from homeassistant.util import dt as dt_util
 
 from . import SmarthomesecCoordinator
-from .const import DOMAIN, TYPE_TRANSLATION
+from .const import DOMAIN
+from .model import DeviceState
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,38 +24,70 @@ class SmarthomesecDevice(CoordinatorEntity):
 
     _attr_has_entity_name = True
 
-    def __init__(self, coord: SmarthomesecCoordinator, device) -> None:
+    def __init__(self, coord: SmarthomesecCoordinator, device: DeviceState) -> None:
         """Initialize a sensor for Smarthomesec device."""
         _LOGGER.info(device)
 
         self._coord = coord
         self._device = device
-        self._attr_unique_id = device["device_id"]
-        self._attr_name = f'{device["device_id"]} - {device["name"]}'
+        self._written_available = None
+        self._attr_unique_id = device.device_id
+        self._attr_name = f'{device.device_id} - {device.name}'
 
         super().__init__(coord, context=self._attr_unique_id)
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self._device = self.coordinator.data["devices"][self._attr_unique_id]
+        if (
+            self._attr_unique_id not in self.coordinator.changed_devices
+            and self._written_available == self.available
+        ):
+            self.coordinator.skipped_writes += 1
+            return
+        device = self.coordinator.data["devices"].get(self._attr_unique_id)
+        if device is None:
+            # Gone from the panel, the platform removes the entity
+            return
+        self._device = device
+        self._written_available = self.available
         self.async_write_ha_state()
 
+    @property
+    def available(self) -> bool:
+        """Return True while the device data is recent enough, even if the last refresh failed."""
+        return self.coordinator.is_fresh(self.coordinator.device_updated(self._attr_unique_id))
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return when the cloud last confirmed the data, as of the last state write."""
+        return data_updated_attributes(self.coordinator.device_updated(self._attr_unique_id))
+
+
+def data_updated_attributes(timestamp: float | None) -> dict[str, datetime | None]:
+    """Return the data age attribute of an entity.
+
+    Unchanged data is not written again, so the attribute only moves with
+    state writes instead of adding one per poll.
+    """
+    return {"data_updated": dt_util.utc_from_timestamp(timestamp) if timestamp is not None else None}
+
+
 class SmarthomesecBaseSensor(SmarthomesecDevice):
     """Smarthomesec Sensor base entity."""
 
-    def __init__(self, coord: SmarthomesecCoordinator, device, entry_id: str) -> None:
+    def __init__(self, coord: SmarthomesecCoordinator, device: DeviceState, entry_id: str) -> None:
         """Initialize the SmarthomesecBaseSensor."""
         super().__init__(coord, device)
 
         self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, device["device_id"])},
-            name=device["name"],
+            identifiers={(DOMAIN, device.device_id)},
+            name=device.name,
             manufacturer="SmartHomeSec",
-            serial_number=device["device_id"],
-            model=TYPE_TRANSLATION.get(device["type"], device["type"]),
+            serial_number=device.device_id,
+            model=device.type_name,
         )
 
     def get_type_name(self) -> str:
         """Return the type of the sensor."""
-        return TYPE_TRANSLATION.get(self._device["type"], self._device["type"])
+        return self._device.type_name
@@ -0,0 +1 @@
+"""Offline SmartHomeSec cloud simulator and benchmarks."""
@@ -0,0 +1,307 @@
+"""End-to-end benchmarks of the integration against the local simulator.
+
+Measures import and setup time, event-to-state latency, panel/cycle
+refresh cost, command throughput and entity fan-out for
+SmarthomesecCoordinator and the entity platforms. Needs a Home Assistant development environment with this
+repository checked out as custom_components/smarthomesec:
+
+    python -m custom_components.smarthomesec.bench.benchmark --devices 200
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from homeassistant.components.alarm_control_panel import DOMAIN as ALARM_DOMAIN
+from homeassistant.components.binary_sensor import DOMAIN as BINARY_SENSOR_DOMAIN
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr, entity_registry as er, frame
+from homeassistant.helpers.entity_component import EntityComponent
+
+from .. import SmarthomesecCoordinator
+from ..alarm_control_panel import SmarthomesecAlarm
+from ..binary_sensor import SmarthomesecBinarySensor
+from ..const import ALARM_AREAS, DATA_MANAGER, DOMAIN, TYPE_CLASS_BINARY_SENSOR
+from ..manager import SmarthomesecConnectionManager
+from .simulator import SimulatorConfig, SmarthomesecSimulator
+
+_LOGGER = logging.getLogger(__name__)
+
+ENTRY_ID = "benchmark"
+
+
+class _BenchEntry:
+    """Minimal stand-in for the config entry data read by the alarm entity."""
+
+    entry_id = ENTRY_ID
+    data = {"name": "Bench"}
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+        "p95_ms": round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def async_create_hass(config_dir: str) -> HomeAssistant:
+    """Create a bare Home Assistant instance for benchmarking."""
+    hass = HomeAssistant(config_dir)
+    if hasattr(frame, "async_setup"):
+        frame.async_setup(hass)
+    await er.async_load(hass)
+    await dr.async_load(hass)
+    return hass
+
+
+async def async_create_coordinator(
+    hass: HomeAssistant, simulator: SmarthomesecSimulator
+) -> SmarthomesecCoordinator:
+    """Create a coordinator wired to the simulator."""
+    manager = SmarthomesecConnectionManager(hass, simulator.base_url, simulator.ws_url)
+    hass.data.setdefault(DOMAIN, {})[DATA_MANAGER] = manager
+    account = manager.async_acquire(ENTRY_ID, "bench", "bench")
+    coordinator = SmarthomesecCoordinator(hass, "bench", "bench", account)
+    account.async_add_listener(ENTRY_ID, coordinator.callback)
+    await coordinator.async_refresh()
+    return coordinator
+
+
+def bench_import(package: str) -> dict:
+    """Time a cold import of the integration in a fresh interpreter.
+
+    Uses -X importtime, so Home Assistant modules already needed by the core
+    are counted too; own_ms is the part spent in the integration itself.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {package}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_us = own_us = 0
+    modules = {}
+    for line in proc.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2].strip()
+        if name == package:
+            total_us = cumulative_us
+        if name.startswith(package):
+            own_us += self_us
+            modules[name] = round(self_us / 1000, 3)
+    return {
+        "total_ms": round(total_us / 1000, 3),
+        "own_ms": round(own_us / 1000, 3),
+        "modules": dict(sorted(modules.items(), key=lambda item: -item[1])),
+    }
+
+
+def _open_fds() -> int | None:
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+async def bench_reload(hass: HomeAssistant, simulator: SmarthomesecSimulator, cycles: int) -> dict:
+    """Set up and tear down an entry repeatedly and watch for leaks."""
+    manager = hass.data[DOMAIN][DATA_MANAGER]
+    threads, fds = threading.active_count(), _open_fds()
+    samples = []
+    for index in range(cycles):
+        entry_id = f"reload-{index}"
+        start = time.perf_counter()
+        account = manager.async_acquire(entry_id, "reload", "reload")
+        coordinator = SmarthomesecCoordinator(hass, "reload", "reload", account)
+        account.async_add_listener(entry_id, coordinator.callback)
+        await coordinator.async_refresh()
+        coordinator.async_start_push()
+        await coordinator.async_shutdown()
+        await manager.async_release(entry_id)
+        samples.append(time.perf_counter() - start)
+    await hass.async_block_till_done()
+    after_fds = _open_fds()
+    return {
+        **_summary(samples),
+        "thread_delta": threading.active_count() - threads,
+        "fd_delta": after_fds - fds if fds is not None and after_fds is not None else None,
+    }
+
+
+async def bench_refresh(coordinator: SmarthomesecCoordinator, rounds: int) -> dict:
+    """Time full panel/cycle refreshes."""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await coordinator.async_refresh()
+        samples.append(time.perf_counter() - start)
+    return _summary(samples)
+
+
+async def bench_commands(coordinator: SmarthomesecCoordinator, count: int, concurrency: int) -> dict:
+    """Measure panel/mode commands per second."""
+    semaphore = asyncio.Semaphore(concurrency)
+    modes = ("arm", "home", "disarm")
+
+    async def _command(index: int) -> None:
+        async with semaphore:
+            await coordinator.set_alarm_mode(ALARM_AREAS[0], modes[index % 3], "1234")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_command(index) for index in range(count)))
+    elapsed = time.perf_counter() - start
+    return {"count": count, "concurrency": concurrency, "per_second": round(count / elapsed, 1)}
+
+
+async def bench_event_latency(
+    hass: HomeAssistant,
+    simulator: SmarthomesecSimulator,
+    coordinator: SmarthomesecCoordinator,
+    count: int,
+) -> dict:
+    """Time push events from the simulator until the coordinator has them."""
+    samples: list[float] = []
+    # device_id -> sequence numbers of the toggles not seen yet, oldest first
+    pending: dict[str, list[int]] = {}
+    done = asyncio.Event()
+
+    def _listener() -> None:
+        for device_id in coordinator.changed_devices:
+            if pending.get(device_id):
+                seq = pending[device_id].pop(0)
+                samples.append(time.perf_counter() - simulator.sent_events[seq])
+        if len(samples) >= count:
+            done.set()
+
+    unsub = coordinator.async_add_listener(_listener)
+    try:
+        for _ in range(count):
+            seq = await simulator.toggle_random_device()
+            pending.setdefault(simulator.sent_devices[seq], []).append(seq)
+            await asyncio.sleep(0.01)
+        await asyncio.wait_for(done.wait(), timeout=30)
+    except TimeoutError:
+        _LOGGER.warning(
+            "%s events never reached the coordinator", sum(len(seqs) for seqs in pending.values())
+        )
+    finally:
+        unsub()
+    return _summary(samples)
+
+
+async def bench_entities(hass: HomeAssistant, coordinator: SmarthomesecCoordinator) -> dict:
+    """Add all entities and time a coordinator fan-out."""
+    binary_sensors = EntityComponent(_LOGGER, BINARY_SENSOR_DOMAIN, hass)
+    alarms = EntityComponent(_LOGGER, ALARM_DOMAIN, hass)
+
+    devices = coordinator.get_devices_by_type(TYPE_CLASS_BINARY_SENSOR)
+    await binary_sensors.async_add_entities(
+        [SmarthomesecBinarySensor(coordinator, device, ENTRY_ID) for device in devices]
+    )
+    await alarms.async_add_entities(
+        [SmarthomesecAlarm(coordinator, area, _BenchEntry()) for area in coordinator.get_alarms(ALARM_AREAS)]
+    )
+
+    writes = 0
+
+    def _count(_event) -> None:
+        nonlocal writes
+        writes += 1
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _count)
+    skipped = coordinator.skipped_writes
+    start = time.perf_counter()
+    coordinator.async_update_listeners()
+    elapsed = time.perf_counter() - start
+    await hass.async_block_till_done()
+    unsub()
+    return {
+        "entities": len(devices) + len(ALARM_AREAS),
+        "fan_out_ms": round(elapsed * 1000, 3),
+        "state_writes": writes,
+        "skipped_writes": coordinator.skipped_writes - skipped,
+    }
+
+
+async def async_run(args: argparse.Namespace) -> dict:
+    """Run every benchmark and return the results."""
+    simulator = SmarthomesecSimulator(
+        SimulatorConfig(
+            door_contacts=args.devices,
+            pirs=args.pirs,
+            event_rate=0,
+            latency=args.latency,
+            error_rate=args.error_rate,
+        )
+    )
+    await simulator.start()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+        try:
+            start = time.perf_counter()
+            coordinator = await async_create_coordinator(hass, simulator)
+            # The request budget would otherwise dominate the timings
+            coordinator.account.governor.rate = args.request_rate
+            results = {
+                "import": bench_import(__package__.rpartition(".")[0]),
+                "setup_ms": round((time.perf_counter() - start) * 1000, 3),
+                "refresh": await bench_refresh(coordinator, args.rounds),
+                "entities": await bench_entities(hass, coordinator),
+            }
+            # Push starts once entities are registered, as in async_setup_entry
+            coordinator.async_start_push()
+            # Give the push client time to finish its handshake
+            await asyncio.sleep(0.5)
+            results["event_latency"] = await bench_event_latency(
+                hass, simulator, coordinator, args.events
+            )
+            results["commands"] = await bench_commands(coordinator, args.commands, args.concurrency)
+            results["reload"] = await bench_reload(hass, simulator, args.reloads)
+            results["simulator"] = simulator.stats
+            results["metrics"] = coordinator.account.metrics.as_dict()
+            await coordinator.async_shutdown()
+            await coordinator.account.async_close()
+        finally:
+            await hass.async_stop(force=True)
+            await simulator.stop()
+    return results
+
+
+def main() -> None:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=50, help="door contacts")
+    parser.add_argument("--pirs", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=50, help="refresh rounds")
+    parser.add_argument("--events", type=int, default=100)
+    parser.add_argument("--commands", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--reloads", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--request-rate", type=float, default=1000.0, help="REST calls per second")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    print(json.dumps(asyncio.run(async_run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
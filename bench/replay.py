@@ -0,0 +1,163 @@
+"""Replay a traffic capture into the coordinator and entity platforms.
+
+Feeds the panel/cycle bodies and Engine.IO frames recorded by the
+smarthomesec.start_capture service back into SmarthomesecCoordinator at
+their recorded pace, faster, or as fast as possible, optionally cloning
+every device to profile installations many times larger:
+
+    python -m custom_components.smarthomesec.bench.replay capture.jsonl.gz --speed 10 --scale 50
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from typing import Any
+
+from .. import SmarthomesecCoordinator
+from ..api import SmarthomesecApi, decode_json
+from ..capture import KIND_FRAME, KIND_REST, read_capture
+from ..const import DATA_MANAGER, DOMAIN, ENDPOINT_CYCLE
+from ..manager import SmarthomesecConnectionManager
+from ..ws_client import decode_event, split_packet
+from .benchmark import ENTRY_ID, _summary, async_create_hass, bench_entities
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ReplayApi(SmarthomesecApi):
+    """Transport answering from the capture instead of the cloud."""
+
+    def __init__(self) -> None:
+        """Initialize the transport."""
+        super().__init__(None, "replay://", "replay://")
+        self.cycle = b""
+
+    async def async_login(self, username, password, metrics=None) -> dict[str, Any]:
+        """Accept any credentials."""
+        return {"token": "replay", "data": {"user_id": "replay"}}
+
+    async def async_request(
+        self, method, path, token, userid, payload=None, raw=False, metrics=None
+    ):
+        """Return the current panel/cycle body, or a successful command."""
+        content = self.cycle if path == ENDPOINT_CYCLE else b'{"result":1}'
+        return 200, content if raw else decode_json(content)
+
+
+def _clone(device: dict[str, Any], copies: int) -> list[dict[str, Any]]:
+    device_id = device["device_id"]
+    name = device.get("name", device_id)
+    return [device] + [
+        {**device, "device_id": f"{device_id}-{index}", "name": f"{name} {index}"}
+        for index in range(1, copies)
+    ]
+
+
+def scale_payload(value: Any, copies: int) -> Any:
+    """Return a payload with every device entry repeated copies times."""
+    if isinstance(value, list):
+        scaled = []
+        for item in value:
+            if isinstance(item, dict) and "device_id" in item:
+                scaled.extend(_clone(item, copies))
+            else:
+                scaled.append(scale_payload(item, copies))
+        return scaled
+    if isinstance(value, dict):
+        if "device_id" in value:
+            return _clone(value, copies)
+        return {key: scale_payload(item, copies) for key, item in value.items()}
+    return value
+
+
+def scale_record(record: dict[str, Any], copies: int) -> dict[str, Any]:
+    """Synthesize a larger installation from one capture line."""
+    if copies <= 1:
+        return record
+    if record["k"] == KIND_REST and record["p"] == ENDPOINT_CYCLE:
+        body = json.loads(record["b"])
+        return {**record, "b": json.dumps(scale_payload(body, copies))}
+    if record["k"] == KIND_FRAME:
+        code, content = split_packet(record["f"])
+        if code == "42" and (start := content.find("[")) >= 0:
+            packet = scale_payload(json.loads(content[start:]), copies)
+            return {**record, "f": code + content[:start] + json.dumps(packet)}
+    return record
+
+
+async def async_replay(args: argparse.Namespace) -> dict:
+    """Replay a capture and return the timings."""
+    records = [scale_record(record, args.scale) for record in read_capture(args.capture)]
+    cycles = [
+        record for record in records if record["k"] == KIND_REST and record["p"] == ENDPOINT_CYCLE
+    ]
+    if not cycles:
+        raise SystemExit("The capture holds no panel/cycle response")
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+        try:
+            manager = SmarthomesecConnectionManager(hass)
+            api = manager.api = ReplayApi()
+            api.cycle = cycles[0]["b"].encode()
+            hass.data.setdefault(DOMAIN, {})[DATA_MANAGER] = manager
+            account = manager.async_acquire(ENTRY_ID, "replay", "replay")
+            account.governor.rate = args.request_rate
+            coordinator = SmarthomesecCoordinator(hass, "replay", "replay", account)
+            account.async_add_listener(ENTRY_ID, coordinator.callback)
+            await coordinator.async_refresh()
+
+            results = {
+                "devices": len(coordinator.data["devices"]),
+                "entities": await bench_entities(hass, coordinator),
+            }
+            refreshes: list[float] = []
+            frames: list[float] = []
+            start = time.perf_counter()
+            for record in records:
+                if args.speed > 0:
+                    delay = record["t"] / args.speed - (time.perf_counter() - start)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                if record["k"] == KIND_REST and record["p"] == ENDPOINT_CYCLE:
+                    api.cycle = record["b"].encode()
+                    began = time.perf_counter()
+                    await coordinator.async_refresh()
+                    refreshes.append(time.perf_counter() - began)
+                elif record["k"] == KIND_FRAME:
+                    code, content = split_packet(record["f"])
+                    data = decode_event(content) if code == "42" else content
+                    began = time.perf_counter()
+                    account.callback(code, data)
+                    frames.append(time.perf_counter() - began)
+            await hass.async_block_till_done()
+
+            results["wall_s"] = round(time.perf_counter() - start, 3)
+            results["refresh"] = _summary(refreshes)
+            results["frames"] = _summary(frames)
+            results["skipped_writes"] = coordinator.skipped_writes
+            results["metrics"] = account.metrics.as_dict()
+            await coordinator.async_shutdown()
+        finally:
+            await hass.async_stop(force=True)
+    return results
+
+
+def main() -> None:
+    """Replay a capture from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="file written by smarthomesec.start_capture")
+    parser.add_argument("--speed", type=float, default=1.0, help="0 replays as fast as possible")
+    parser.add_argument("--scale", type=int, default=1, help="copies of every device")
+    parser.add_argument("--request-rate", type=float, default=1000.0, help="REST calls per second")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    print(json.dumps(asyncio.run(async_replay(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
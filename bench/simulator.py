@@ -0,0 +1,279 @@
+"""Local stand-in for the SmartHomeSec cloud.
+
+Implements the endpoints the integration uses (auth/login, panel/cycle,
+panel/mode) and the Socket.IO websocket, with configurable installation
+size, event rate, latency and error injection.
+
+Run standalone with:
+
+    python -m custom_components.smarthomesec.bench.simulator --devices 50
+"""
+
+import argparse
+import asyncio
+from dataclasses import dataclass
+import json
+import logging
+import random
+import time
+import uuid
+
+from aiohttp import WSMsgType, web
+
+_LOGGER = logging.getLogger(__name__)
+
+BASEPATH = "/REST/v2"
+
+
+@dataclass
+class SimulatorConfig:
+    """Behaviour of the simulated cloud."""
+
+    door_contacts: int = 10
+    pirs: int = 5
+    areas: int = 1
+    # Push events per second across all devices, 0 disables them
+    event_rate: float = 1.0
+    # Added latency per REST call (seconds)
+    latency: float = 0.0
+    # Share of REST calls answered with a 500
+    error_rate: float = 0.0
+    # Seconds before a token is rejected with a 401, 0 never expires
+    token_ttl: float = 0.0
+    ping_interval: int = 25000
+    ping_timeout: int = 20000
+
+
+class SmarthomesecSimulator:
+    """aiohttp server simulating the SmartHomeSec cloud."""
+
+    def __init__(self, config: SimulatorConfig | None = None) -> None:
+        """Initialize the simulator."""
+        self.config = config or SimulatorConfig()
+        self.devices: dict[str, dict] = {}
+        self.areas: dict[str, dict] = {}
+        self.tokens: dict[str, float] = {}
+        self.sockets: set[web.WebSocketResponse] = set()
+        # Send time of every pushed event, keyed by sequence number
+        self.sent_events: dict[int, float] = {}
+        # Device toggled by each pushed device event
+        self.sent_devices: dict[int, str] = {}
+        self.stats = {"login": 0, "cycle": 0, "mode": 0, "errors": 0, "events": 0}
+
+        self._seq = 0
+        self._runner: web.AppRunner | None = None
+        self._event_task: asyncio.Task | None = None
+        self.port: int | None = None
+        self._build_installation()
+
+    def _build_installation(self) -> None:
+        for index in range(self.config.door_contacts):
+            device_id = f"DC:{index:06d}"
+            self.devices[device_id] = {
+                "device_id": device_id,
+                "name": f"Door {index}",
+                "type": "device_type.door_contact",
+                "area": "1",
+                "status_open": ["device_status.dc_close"],
+                "status_motion": "",
+            }
+        for index in range(self.config.pirs):
+            device_id = f"IR:{index:06d}"
+            self.devices[device_id] = {
+                "device_id": device_id,
+                "name": f"PIR {index}",
+                "type": "device_type.pir",
+                "area": "1",
+                "status_open": [],
+                "status_motion": "0",
+            }
+        for area in range(1, self.config.areas + 1):
+            self.areas[str(area)] = {"area": area, "mode": "disarm"}
+
+    @property
+    def base_url(self) -> str:
+        """Return the REST base URL."""
+        return f"http://127.0.0.1:{self.port}{BASEPATH}"
+
+    @property
+    def ws_url(self) -> str:
+        """Return the Socket.IO URL."""
+        return f"ws://127.0.0.1:{self.port}/ws/socket.io/"
+
+    async def start(self, port: int = 0) -> None:
+        """Start serving."""
+        app = web.Application()
+        app.router.add_post(f"{BASEPATH}/auth/login", self._handle_login)
+        app.router.add_get(f"{BASEPATH}/panel/cycle", self._handle_cycle)
+        app.router.add_post(f"{BASEPATH}/panel/mode", self._handle_mode)
+        app.router.add_get("/ws/socket.io/", self._handle_ws)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+        if self.config.event_rate > 0:
+            self._event_task = asyncio.create_task(self._event_loop())
+        _LOGGER.info("Simulator listening on %s", self.base_url)
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._event_task is not None:
+            self._event_task.cancel()
+        for ws in list(self.sockets):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _delay_or_fail(self) -> web.Response | None:
+        if self.config.latency:
+            await asyncio.sleep(self.config.latency)
+        if self.config.error_rate and random.random() < self.config.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"error": "injected"}, status=500)
+        return None
+
+    def _authorized(self, request: web.Request) -> bool:
+        issued = self.tokens.get(request.headers.get("token", ""))
+        if issued is None:
+            return False
+        return not self.config.token_ttl or time.monotonic() - issued < self.config.token_ttl
+
+    async def _handle_login(self, request: web.Request) -> web.Response:
+        if (error := await self._delay_or_fail()) is not None:
+            return error
+        form = await request.post()
+        if not form.get("account") or not form.get("password"):
+            return web.json_response({"error": "bad credentials"}, status=401)
+        self.stats["login"] += 1
+        token = uuid.uuid4().hex
+        self.tokens[token] = time.monotonic()
+        return web.json_response({"token": token, "data": {"user_id": "sim-user"}})
+
+    async def _handle_cycle(self, request: web.Request) -> web.Response:
+        if (error := await self._delay_or_fail()) is not None:
+            return error
+        if not self._authorized(request):
+            return web.json_response({"error": "unauthorized"}, status=401)
+        self.stats["cycle"] += 1
+        return web.json_response(
+            {
+                "data": {
+                    "device_status": list(self.devices.values()),
+                    "model": list(self.areas.values()),
+                }
+            }
+        )
+
+    async def _handle_mode(self, request: web.Request) -> web.Response:
+        if (error := await self._delay_or_fail()) is not None:
+            return error
+        if not self._authorized(request):
+            return web.json_response({"error": "unauthorized"}, status=401)
+        form = await request.post()
+        area = self.areas.get(str(form.get("area")))
+        if area is None:
+            return web.json_response({"error": "unknown area"}, status=400)
+        self.stats["mode"] += 1
+        area["mode"] = form.get("mode")
+        await self.broadcast("mode_change", {"area": area["area"], "mode": area["mode"]})
+        return web.json_response({"result": 1})
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        if request.query.get("token") not in self.tokens:
+            await ws.close()
+            return ws
+
+        handshake = {
+            "sid": uuid.uuid4().hex,
+            "upgrades": [],
+            "pingInterval": self.config.ping_interval,
+            "pingTimeout": self.config.ping_timeout,
+        }
+        await ws.send_str("0" + json.dumps(handshake))
+        await ws.send_str("40")
+        self.sockets.add(ws)
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT and msg.data == "2":
+                    await ws.send_str("3")
+        finally:
+            self.sockets.discard(ws)
+        return ws
+
+    async def broadcast(self, name: str, data: dict) -> int:
+        """Send a "42" event to every connected client and return its sequence number."""
+        self._seq += 1
+        data = {**data, "sim_seq": self._seq}
+        frame = "42" + json.dumps([name, data])
+        self.sent_events[self._seq] = time.perf_counter()
+        if "device_id" in data:
+            self.sent_devices[self._seq] = data["device_id"]
+        self.stats["events"] += 1
+        for ws in list(self.sockets):
+            await ws.send_str(frame)
+        return self._seq
+
+    async def toggle_random_device(self) -> int:
+        """Flip a random device and push the change."""
+        device = random.choice(list(self.devices.values()))
+        if device["type"] == "device_type.pir":
+            device["status_motion"] = "0" if device["status_motion"] == "1" else "1"
+            change = {"status_motion": device["status_motion"]}
+        else:
+            is_open = device["status_open"][0] == "device_status.dc_open"
+            device["status_open"] = ["device_status.dc_close" if is_open else "device_status.dc_open"]
+            change = {"status_open": device["status_open"]}
+        return await self.broadcast("device_status", {"device_id": device["device_id"], **change})
+
+    async def _event_loop(self) -> None:
+        while True:
+            await asyncio.sleep(random.expovariate(self.config.event_rate))
+            await self.toggle_random_device()
+
+
+async def _run(args: argparse.Namespace) -> None:
+    simulator = SmarthomesecSimulator(
+        SimulatorConfig(
+            door_contacts=args.devices,
+            pirs=args.pirs,
+            areas=args.areas,
+            event_rate=args.event_rate,
+            latency=args.latency,
+            error_rate=args.error_rate,
+            token_ttl=args.token_ttl,
+        )
+    )
+    await simulator.start(args.port)
+    print(f"REST: {simulator.base_url}\nWS:   {simulator.ws_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+
+def main() -> None:
+    """Run the simulator from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--devices", type=int, default=10, help="door contacts")
+    parser.add_argument("--pirs", type=int, default=5)
+    parser.add_argument("--areas", type=int, default=1)
+    parser.add_argument("--event-rate", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-ttl", type=float, default=0.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
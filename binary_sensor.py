@@ -6,6 +6,7 @@ from datetime import timedelta
 import logging
 
 from homeassistant.components.binary_sensor import (
+    DOMAIN as BINARY_SENSOR_DOMAIN,
     BinarySensorDeviceClass,
     BinarySensorEntity,
 )
@@ -15,6 +16,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DOMAIN, TYPE_CLASS_BINARY_SENSOR
 from .base_entity import SmarthomesecBaseSensor
+from .discovery import async_track_inventory
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,10 +29,19 @@ async def async_setup_entry(
     """Set up a binary sensors for a Smarthomesec device."""
 
     coord = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
-    devices = hass.data[DOMAIN][config_entry.entry_id]["binary_sensor_devices"]
 
-    async_add_entities(
-        SmarthomesecBinarySensor(coord, device, config_entry.entry_id) for device in devices
+    async_track_inventory(
+        coord,
+        config_entry,
+        BINARY_SENSOR_DOMAIN,
+        async_add_entities,
+        lambda: {
+            device.device_id: device
+            for device in coord.get_devices_by_type(TYPE_CLASS_BINARY_SENSOR)
+        },
+        lambda device: SmarthomesecBinarySensor(coord, device, config_entry.entry_id),
+        unique_id=lambda device_id: device_id,
+        device_identifier=lambda device_id: (DOMAIN, device_id),
     )
 
 
@@ -40,12 +51,9 @@ class SmarthomesecBinarySensor(SmarthomesecBaseSensor, BinarySensorEntity):
     @property
     def is_on(self) -> bool:
         """Return True if the binary sensor is on."""
-        if len(self._device["status_open"]):
-            return (self._device["status_open"][0] == "device_status.dc_open")
-        elif self._device["status_motion"]:
-            return (self._device["status_motion"] == "1")
+        return self._device.is_on
 
     @property
     def device_class(self) -> BinarySensorDeviceClass | None:
         """Return the class of the binary sensor."""
-        return TYPE_CLASS_BINARY_SENSOR[self._device["type"]]
+        return self._device.device_class
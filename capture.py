@@ -0,0 +1,121 @@
+"""Opt-in capture of REST responses and push frames for replay."""
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import CAPTURE_FLUSH_INTERVAL, CAPTURE_FLUSH_LINES
+
+_LOGGER = logging.getLogger(__name__)
+
+KIND_REST = "rest"
+KIND_FRAME = "ws"
+
+
+class TrafficRecorder:
+    """Append REST bodies and Engine.IO frames to a gzipped JSON lines file.
+
+    Every line holds the seconds since the capture started under "t". Lines
+    are buffered on the event loop and written in the executor one flush
+    after the other, each appending a gzip member so an interrupted capture
+    stays readable.
+    auth/login is never captured, it carries the token.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the recorder."""
+        self.hass = hass
+        self.path = path
+        self.lines = 0
+        self._start = time.monotonic()
+        self._buffer: list[str] = []
+        self._unsub_flush = None
+        self._write_task: asyncio.Task | None = None
+
+    def _append(self, record: dict[str, Any]) -> None:
+        record["t"] = round(time.monotonic() - self._start, 4)
+        self._buffer.append(json.dumps(record, separators=(",", ":")))
+        self.lines += 1
+        if len(self._buffer) >= CAPTURE_FLUSH_LINES:
+            self.async_flush()
+        elif self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self.hass, CAPTURE_FLUSH_INTERVAL, self._async_flush_later
+            )
+
+    @callback
+    def record_rest(self, method: str, path: str, status: int, content: bytes) -> None:
+        """Capture a REST response."""
+        self._append(
+            {"k": KIND_REST, "m": method, "p": path, "s": status, "b": content.decode(errors="replace")}
+        )
+
+    @callback
+    def record_frame(self, frame: str) -> None:
+        """Capture a raw Engine.IO frame."""
+        self._append({"k": KIND_FRAME, "f": frame})
+
+    @callback
+    def _async_flush_later(self, _now) -> None:
+        self._unsub_flush = None
+        self.async_flush()
+
+    @callback
+    def async_flush(self) -> None:
+        """Write the buffered lines in the executor after any pending write."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        self._write_task = self.hass.async_create_background_task(
+            self._async_write(self._write_task, lines), "smarthomesec capture write"
+        )
+
+    async def async_close(self) -> None:
+        """Flush the buffer and wait until everything is on disk."""
+        self.async_flush()
+        if self._write_task is not None:
+            await self._write_task
+
+    async def _async_write(self, previous: asyncio.Task | None, lines: list[str]) -> None:
+        # Two writers appending to one gzip file would interleave members
+        if previous is not None:
+            await previous
+        try:
+            await self.hass.async_add_executor_job(self._write, lines)
+        except OSError as ex:
+            _LOGGER.error("Cannot write capture to %s: %s", self.path, ex)
+
+    def _write(self, lines: list[str]) -> None:
+        with gzip.open(self.path, "at", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+
+def can_append(path: str) -> bool:
+    """Return True if path does not exist yet or holds a capture."""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            line = file.readline()
+    except FileNotFoundError:
+        return True
+    except (OSError, EOFError, UnicodeDecodeError):
+        return False
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return False
+    return isinstance(record, dict) and record.get("k") in (KIND_REST, KIND_FRAME)
+
+
+def read_capture(path: str) -> list[dict[str, Any]]:
+    """Load a capture written by TrafficRecorder."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
@@ -0,0 +1,209 @@
+"""Per-area alarm command queue with optimistic state and confirmation tracking."""
+
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .api import SmarthomesecAuthError, SmarthomesecRateLimitedError, SmarthomesecRejectedError
+from .governor import SmarthomesecCircuitOpenError
+from .const import COMMAND_CONFIRM_TIMEOUT, COMMAND_RETRIES, COMMAND_RETRY_BACKOFF
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class AlarmCommand:
+    """A panel/mode command for one area."""
+
+    area: str
+    mode: str
+    pin: str | None
+    future: asyncio.Future
+    submitted: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+    confirm_timer: asyncio.TimerHandle | None = None
+
+
+class AlarmCommandQueue:
+    """Send alarm commands one area at a time.
+
+    Identical commands already queued or in flight are deduplicated, failed
+    sends are retried with backoff, and once sent a command stays pending
+    until a snapshot or push event shows the area in the requested mode.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        send: Callable[[str, str, str | None], Awaitable[Any]],
+        after_send: Callable[[], None],
+        current: Callable[[], dict[str, dict] | None],
+    ) -> None:
+        """Initialize the queue."""
+        self.hass = hass
+        self._send = send
+        self._after_send = after_send
+        self._current = current
+        self._queues: dict[str, deque[AlarmCommand]] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+        self._awaiting: dict[str, AlarmCommand] = {}
+        self._listeners: dict[str, list[Callable[[], None]]] = {}
+
+        self.stats = {
+            "submitted": 0,
+            "deduplicated": 0,
+            "sent": 0,
+            "retries": 0,
+            "failed": 0,
+            "confirmed": 0,
+            "unconfirmed": 0,
+            "last_confirm_latency": None,
+        }
+
+    @callback
+    def async_add_listener(self, area: str, listener: Callable[[], None]) -> Callable[[], None]:
+        """Listen for pending state changes of an area."""
+        listeners = self._listeners.setdefault(area, [])
+        listeners.append(listener)
+        return lambda: listeners.remove(listener)
+
+    @callback
+    def _async_notify(self, area: str) -> None:
+        for listener in list(self._listeners.get(area, ())):
+            listener()
+
+    def pending_mode(self, area: str) -> str | None:
+        """Return the mode the area is being switched to, if any."""
+        if queue := self._queues.get(area):
+            return queue[-1].mode
+        if command := self._awaiting.get(area):
+            return command.mode
+        return None
+
+    async def async_submit(self, area: str, mode: str, pin: str | None) -> None:
+        """Queue a command and wait until the cloud accepted it."""
+        self.stats["submitted"] += 1
+        queue = self._queues.setdefault(area, deque())
+        for command in queue:
+            if command.mode == mode and command.pin == pin:
+                self.stats["deduplicated"] += 1
+                return await asyncio.shield(command.future)
+
+        command = AlarmCommand(area, mode, pin, self.hass.loop.create_future())
+        queue.append(command)
+        self._async_clear_awaiting(area)
+        self._async_notify(area)
+
+        if area not in self._workers:
+            self._workers[area] = self.hass.async_create_background_task(
+                self._async_worker(area), f"smarthomesec command {area}"
+            )
+        return await asyncio.shield(command.future)
+
+    async def _async_worker(self, area: str) -> None:
+        queue = self._queues[area]
+        try:
+            while queue:
+                command = queue[0]
+                try:
+                    await self._async_send(command)
+                except Exception as ex:  # pylint: disable=broad-except
+                    self.stats["failed"] += 1
+                    if not command.future.done():
+                        command.future.set_exception(ex)
+                    queue.popleft()
+                    self._async_notify(area)
+                    continue
+
+                queue.popleft()
+                self.stats["sent"] += 1
+                if not command.future.done():
+                    command.future.set_result(None)
+                if not queue:
+                    self._async_await_confirmation(command)
+        finally:
+            del self._workers[area]
+
+    async def _async_send(self, command: AlarmCommand) -> None:
+        while True:
+            command.attempts += 1
+            try:
+                await self._send(command.area, command.mode, command.pin)
+                return
+            except (
+                SmarthomesecRejectedError,
+                SmarthomesecAuthError,
+                SmarthomesecCircuitOpenError,
+                SmarthomesecRateLimitedError,
+            ):
+                # Wrong pin, refused mode or credentials, or a degraded or
+                # throttling cloud: retrying will not help
+                raise
+            except Exception as ex:  # pylint: disable=broad-except
+                if command.attempts > COMMAND_RETRIES:
+                    raise
+                delay = COMMAND_RETRY_BACKOFF * 2 ** (command.attempts - 1)
+                self.stats["retries"] += 1
+                _LOGGER.warning("Command %s failed (%s), retrying in %ss", command.mode, ex, delay)
+                await asyncio.sleep(delay)
+
+    @callback
+    def _async_await_confirmation(self, command: AlarmCommand) -> None:
+        self._awaiting[command.area] = command
+        # The push event may have landed before the POST returned, or the
+        # area was already in that mode
+        self.async_confirm(self._current())
+        if command.area not in self._awaiting:
+            return
+        command.confirm_timer = self.hass.loop.call_later(
+            COMMAND_CONFIRM_TIMEOUT, self._async_confirm_timeout, command
+        )
+        self._after_send()
+
+    @callback
+    def _async_confirm_timeout(self, command: AlarmCommand) -> None:
+        if self._awaiting.get(command.area) is not command:
+            return
+        _LOGGER.warning("Area %s never reported mode %s", command.area, command.mode)
+        self.stats["unconfirmed"] += 1
+        del self._awaiting[command.area]
+        self._async_notify(command.area)
+
+    @callback
+    def _async_clear_awaiting(self, area: str) -> None:
+        if (command := self._awaiting.pop(area, None)) and command.confirm_timer:
+            command.confirm_timer.cancel()
+
+    @callback
+    def async_confirm(self, data: dict[str, dict] | None) -> None:
+        """Confirm sent commands against a new snapshot."""
+        if not self._awaiting or data is None:
+            return
+        for area, command in list(self._awaiting.items()):
+            alarm = data["alarms"].get(area)
+            if alarm is None or alarm.mode != command.mode:
+                continue
+            latency = time.monotonic() - command.submitted
+            self.stats["confirmed"] += 1
+            self.stats["last_confirm_latency"] = round(latency, 3)
+            self._async_clear_awaiting(area)
+            _LOGGER.debug("Area %s confirmed %s after %.3fs", area, command.mode, latency)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop queued commands and pending confirmations."""
+        for task in self._workers.values():
+            task.cancel()
+        for queue in self._queues.values():
+            for command in queue:
+                if not command.future.done():
+                    command.future.cancel()
+            queue.clear()
+        for area in list(self._awaiting):
+            self._async_clear_awaiting(area)
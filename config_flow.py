@@ -1,23 +1,25 @@
 """Config flow for integration."""
 
-from json import JSONDecodeError
+from collections.abc import Mapping
 import logging
-import requests
-import hashlib
 from typing import Any
 
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import ConfigEntry, ConfigFlow, ConfigFlowResult, OptionsFlow
 from homeassistant.const import (
     CONF_NAME,
     CONF_PASSWORD,
     CONF_USERNAME,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DOMAIN, API_BASEHOST, API_BASEPATH
+from .api import SmarthomesecApiError, SmarthomesecAuthError
+from .auth import async_governed_login
+from .const import DOMAIN, CONF_STALE_WINDOW, STALE_WINDOW
+from .governor import PRIORITY_COMMAND
+from .manager import async_get_manager
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,10 +31,20 @@ DATA_SCHEMA = vol.Schema(
     }
 )
 
+REAUTH_SCHEMA = vol.Schema({vol.Required(CONF_PASSWORD): str})
+
 
 class SmarthomesecConfigFlowHandler(ConfigFlow, domain=DOMAIN):
     """Smarthomesec config flow."""
 
+    _reauth_entry: ConfigEntry | None = None
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Return the options flow."""
+        return SmarthomesecOptionsFlowHandler()
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -45,7 +57,9 @@ class SmarthomesecConfigFlowHandler(ConfigFlow, domain=DOMAIN):
             password = user_input[CONF_PASSWORD]
 
             try:
-                await self.hass.async_add_executor_job(test_host_connection, username, password)
+                await async_validate_credentials(self.hass, username, password)
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except Exception:  # pylint: disable=broad-except
@@ -74,8 +88,8 @@ class SmarthomesecConfigFlowHandler(ConfigFlow, domain=DOMAIN):
         username = user_input[CONF_USERNAME]
         password = user_input[CONF_PASSWORD]
         try:
-            await self.hass.async_add_executor_job(test_host_connection, username, password)
-        except CannotConnect:
+            await async_validate_credentials(self.hass, username, password)
+        except (CannotConnect, InvalidAuth):
             return self.async_abort(reason="cannot_connect")
         except Exception:  # pylint: disable=broad-except
             _LOGGER.exception("Unexpected exception")
@@ -90,31 +104,100 @@ class SmarthomesecConfigFlowHandler(ConfigFlow, domain=DOMAIN):
             },
         )
 
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]) -> ConfigFlowResult:
+        """Handle credentials rejected by the cloud."""
+        self._reauth_entry = self.hass.config_entries.async_get_entry(self.context["entry_id"])
+        return await self.async_step_reauth_confirm()
 
-def test_host_connection(username: str, password: str):
-    """Test if the host is reachable and is actually a Smarthomesec device."""
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Ask for the new password of the account."""
+        errors = {}
+        username = self._reauth_entry.data[CONF_USERNAME]
+
+        if user_input is not None:
+            try:
+                await async_validate_credentials(self.hass, username, user_input[CONF_PASSWORD])
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Unexpected exception")
+                errors["base"] = "unknown"
+
+            else:
+                return self.async_update_reload_and_abort(
+                    self._reauth_entry,
+                    data={**self._reauth_entry.data, CONF_PASSWORD: user_input[CONF_PASSWORD]},
+                )
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
+            data_schema=REAUTH_SCHEMA,
+            description_placeholders={CONF_USERNAME: username},
+            errors=errors,
+        )
+
+
+class SmarthomesecOptionsFlowHandler(OptionsFlow):
+    """Smarthomesec options flow."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_STALE_WINDOW,
+                        default=self.config_entry.options.get(CONF_STALE_WINDOW, STALE_WINDOW),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+                }
+            ),
+        )
+
+
+async def async_validate_credentials(hass: HomeAssistant, username: str, password: str) -> None:
+    """Log in and fetch panel/cycle through the shared transport.
+
+    Both calls count against the request budget of the account. The
+    session and snapshot are handed to the entry setup, which then creates
+    its entities without another round trip.
+    """
+    manager = async_get_manager(hass)
+    api = manager.async_get_api()
+    governor = manager.async_get_governor(username)
 
     try:
-      payload = {
-          "account": username,
-          "password": hashlib.md5(password.encode('utf-8')).hexdigest(),
-          "pw_encrypted": "hashed",
-          "login_entry": "web"
-      }
-      headers = {
-          "cookie": "isPrivacy=1;",
-          "content-type": "application/x-www-form-urlencoded; charset=UTF-8",
-      }
-
-      res = requests.post(f'https://{API_BASEHOST}/{API_BASEPATH}/auth/login', data=payload, headers=headers)
-
-      if res.status_code != 200:
-          raise CannotConnect(f"Status: {res.status_code}")
-      
-    except Exception as ex:
-        _LOGGER.error("Failed to connect to SmartHomeSec: " + ex)
+        session = await async_governed_login(api, governor, username, password)
+        token = session["token"]
+        user_id = session["data"]["user_id"]
+        status, cycle = await governor.async_request(
+            PRIORITY_COMMAND,
+            lambda: api.async_request("GET", "panel/cycle", token, user_id, raw=True),
+        )
+    except SmarthomesecAuthError as ex:
+        raise InvalidAuth from ex
+    except (SmarthomesecApiError, KeyError, TypeError) as ex:
+        _LOGGER.error("Failed to connect to SmartHomeSec: %s", ex)
         raise CannotConnect from ex
 
+    if status != 200 or not cycle:
+        raise CannotConnect(f"Status: {status}")
+
+    await manager.async_store_validated(username, token, user_id, cycle)
+
 
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
+
+
+class InvalidAuth(HomeAssistantError):
+    """Error to indicate the credentials were refused."""
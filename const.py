@@ -21,4 +21,65 @@ TYPE_CLASS_BINARY_SENSOR = {
     "device_type.pir": BinarySensorDeviceClass.MOTION,
 }
 
-ALARM_AREAS = ["1"]
\ No newline at end of file
+ALARM_AREAS = ["1"]
+API_TIMEOUT = 10
+
+# REST path of the panel snapshot
+ENDPOINT_CYCLE = "panel/cycle"
+
+# Seconds to gather push events before refreshing panel/cycle
+REFRESH_COALESCE_WINDOW = 0.5
+
+# Polling intervals (seconds)
+POLL_INTERVAL = 30
+POLL_INTERVAL_PUSH_HEALTHY = 600
+# Error backoff never polls faster than a healthy push channel does
+POLL_INTERVAL_MAX_BACKOFF = 900
+PUSH_HEALTH_CHECK_INTERVAL = 15
+
+# Seconds an entity keeps serving its last known state while refreshes fail,
+# longer than POLL_INTERVAL_PUSH_HEALTHY
+CONF_STALE_WINDOW = "stale_window"
+STALE_WINDOW = 900
+
+# Push reconnection backoff (seconds)
+PUSH_RECONNECT_MIN_DELAY = 1
+PUSH_RECONNECT_MAX_DELAY = 300
+
+DATA_MANAGER = "manager"
+
+# Concurrent REST calls allowed per account
+MAX_CONCURRENT_REQUESTS = 2
+
+# Request budget per account: tokens per second and bucket size
+REQUEST_RATE = 1.0
+REQUEST_BURST = 10
+# Seconds to back off after a 429 without a usable Retry-After
+DEFAULT_RETRY_AFTER = 60
+
+# Seconds a command may wait for the request budget before failing
+COMMAND_MAX_QUEUE_TIME = 5
+
+# Circuit breaker
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_OPEN_TIME = 30
+CIRCUIT_MAX_OPEN_TIME = 600
+
+# Renew tokens in the background once they are this old (seconds)
+TOKEN_REFRESH_AGE = 12 * 3600
+
+# Seconds a panel/cycle body fetched by the config flow may seed the first refresh
+VALIDATED_SESSION_MAX_AGE = 60
+
+# Alarm command pipeline
+COMMAND_RETRIES = 2
+COMMAND_RETRY_BACKOFF = 1.0
+COMMAND_CONFIRM_TIMEOUT = 30
+
+# Traffic capture buffering
+CAPTURE_FLUSH_INTERVAL = 5
+CAPTURE_FLUSH_LINES = 200
+
+# Device/area transitions kept per config entry
+TIMELINE_SIZE = 1000
+TIMELINE_SAVE_DELAY = 300
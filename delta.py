@@ -0,0 +1,97 @@
+"""Decode Socket.IO push payloads into panel/cycle deltas."""
+
+from typing import Any
+
+from .model import build_indexes
+
+
+def _collect(item: Any, devices: list[dict], alarms: list[dict]) -> bool:
+    """Sort one payload item into device or area updates.
+
+    Returns False as soon as something unrecognised is met so the caller
+    can fall back to a full refresh.
+    """
+    if isinstance(item, list):
+        return all(_collect(sub, devices, alarms) for sub in item)
+    if not isinstance(item, dict):
+        return False
+
+    # Same shape as the panel/cycle "data" object
+    if "device_status" in item or "model" in item:
+        return _collect(item.get("device_status", []), devices, alarms) and _collect(
+            item.get("model", []), devices, alarms
+        )
+    if "device_id" in item:
+        devices.append(item)
+        return True
+    if "area" in item and "mode" in item:
+        alarms.append(item)
+        return True
+    if "data" in item:
+        return _collect(item["data"], devices, alarms)
+    return False
+
+
+def extract_delta(data: Any) -> tuple[list[dict], list[dict]] | None:
+    """Return (device updates, area updates) for an event payload.
+
+    None means the payload could not be understood.
+    """
+    devices: list[dict] = []
+    alarms: list[dict] = []
+    if not _collect(data, devices, alarms) or not (devices or alarms):
+        return None
+    return devices, alarms
+
+
+def apply_delta(
+    current: dict[str, dict], devices: list[dict], alarms: list[dict]
+) -> dict[str, dict] | None:
+    """Return a new coordinator snapshot with the delta merged in.
+
+    Unknown devices or areas return None since they mean the panel
+    inventory changed and a full refresh is needed.
+    """
+    new_devices = dict(current["devices"])
+    new_alarms = dict(current["alarms"])
+
+    for device in devices:
+        device_id = device["device_id"]
+        if device_id not in new_devices:
+            return None
+        new_devices[device_id] = new_devices[device_id].merge(device)
+
+    for alarm in alarms:
+        area_id = str(alarm["area"])
+        if area_id not in new_alarms:
+            return None
+        new_alarms[area_id] = new_alarms[area_id].merge(alarm)
+
+    snapshot = {**current, "devices": new_devices, "alarms": new_alarms}
+    if any("type" in device for device in devices):
+        snapshot.update(build_indexes(new_devices))
+    return snapshot
+
+
+def diff_snapshots(
+    old: dict[str, dict] | None, new: dict[str, dict]
+) -> tuple[set[str], set[str]]:
+    """Return the device ids and area ids whose data differs between snapshots."""
+    if old is None:
+        return set(new["devices"]), set(new["alarms"])
+
+    old_devices = old["devices"]
+    old_alarms = old["alarms"]
+    changed_devices = {
+        device_id
+        for device_id, device in new["devices"].items()
+        if old_devices.get(device_id) != device
+    }
+    changed_devices.update(old_devices.keys() - new["devices"].keys())
+    changed_alarms = {
+        area_id
+        for area_id, alarm in new["alarms"].items()
+        if old_alarms.get(area_id) != alarm
+    }
+    changed_alarms.update(old_alarms.keys() - new["alarms"].keys())
+    return changed_devices, changed_alarms
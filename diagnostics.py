@@ -0,0 +1,51 @@
+"""Diagnostics support for SmartHomeSec."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    auth = coordinator.account.auth
+    wsc = coordinator.wsc
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": coordinator.update_interval.total_seconds(),
+            "consecutive_failures": coordinator.consecutive_failures,
+            "stale_window": coordinator.stale_window,
+            "last_good": coordinator.last_good,
+            "push_healthy": coordinator.push_healthy,
+            "push_connected": wsc is not None and wsc.wsc is not None,
+            "push_connections": wsc.connections if wsc is not None else 0,
+            "push_reconnect_failures": wsc.failures if wsc is not None else 0,
+            "skipped_writes": coordinator.skipped_writes,
+            "fingerprint": coordinator.fingerprint_stats,
+            "discarded_refreshes": coordinator.discarded_refreshes,
+            "refresh_scheduler": {
+                **coordinator.refresh_scheduler.stats,
+                "last_burst": coordinator.refresh_scheduler.last_burst,
+            },
+            "commands": coordinator.commands.stats,
+        },
+        "timeline": [event.as_dict() for event in coordinator.timeline.query(limit=50)],
+        "governor": coordinator.account.governor.as_dict(),
+        "auth": {**auth.stats, "token_age": auth.token_age},
+        # Shared by the entries of the same account
+        "metrics": coordinator.account.metrics.as_dict(),
+    }
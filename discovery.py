@@ -0,0 +1,77 @@
+"""Add and remove entities as the panel inventory changes."""
+
+from collections.abc import Callable, Mapping
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from . import SmarthomesecCoordinator
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_track_inventory(
+    coord: SmarthomesecCoordinator,
+    entry: ConfigEntry,
+    platform: str,
+    async_add_entities: AddEntitiesCallback,
+    items: Callable[[], Mapping[str, Any]],
+    factory: Callable[[Any], Entity],
+    unique_id: Callable[[str], str],
+    device_identifier: Callable[[str], tuple[str, str]] | None = None,
+) -> None:
+    """Keep a platform's entities in line with the coordinator snapshot.
+
+    items returns the current objects by id. New ids are added and vanished
+    ids removed from the registries, each in one batch per snapshot, and
+    only when the coordinator reports an inventory change.
+    """
+    known: set[str] = set()
+
+    @callback
+    def _async_sync() -> None:
+        if known and not coord.inventory_changed:
+            return
+        current = items()
+        added = current.keys() - known
+        removed = known - current.keys()
+
+        if added:
+            _LOGGER.debug("Adding %s %s entities", len(added), platform)
+            async_add_entities(factory(current[item_id]) for item_id in added)
+        if removed:
+            _LOGGER.debug("Removing %s %s entities", len(removed), platform)
+            _async_remove(coord, entry, platform, removed, unique_id, device_identifier)
+        known.difference_update(removed)
+        known.update(added)
+
+    _async_sync()
+    entry.async_on_unload(coord.async_add_listener(_async_sync))
+
+
+@callback
+def _async_remove(
+    coord: SmarthomesecCoordinator,
+    entry: ConfigEntry,
+    platform: str,
+    removed: set[str],
+    unique_id: Callable[[str], str],
+    device_identifier: Callable[[str], tuple[str, str]] | None,
+) -> None:
+    ent_reg = er.async_get(coord.hass)
+    dev_reg = dr.async_get(coord.hass)
+    for item_id in removed:
+        # Removing the registry entry also removes the entity from its platform
+        if entity_id := ent_reg.async_get_entity_id(platform, DOMAIN, unique_id(item_id)):
+            ent_reg.async_remove(entity_id)
+        if device_identifier is None:
+            continue
+        if device := dev_reg.async_get_device(identifiers={device_identifier(item_id)}):
+            dev_reg.async_update_device(device.id, remove_config_entry_id=entry.entry_id)
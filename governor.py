@@ -0,0 +1,236 @@
+"""Token-bucket budget, priorities and circuit breaker for cloud calls."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import heapq
+import itertools
+import logging
+import time
+from typing import Any
+
+from .api import SmarthomesecApiError, SmarthomesecAuthError, SmarthomesecRateLimitedError
+from .const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_MAX_OPEN_TIME,
+    CIRCUIT_OPEN_TIME,
+    COMMAND_MAX_QUEUE_TIME,
+    DEFAULT_RETRY_AFTER,
+    MAX_CONCURRENT_REQUESTS,
+    REQUEST_BURST,
+    REQUEST_RATE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_COMMAND = 0
+PRIORITY_POLL = 1
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class SmarthomesecCircuitOpenError(SmarthomesecApiError):
+    """Error to indicate calls are refused while the cloud is degraded."""
+
+
+class RequestGovernor:
+    """Gate the REST calls of an account.
+
+    Calls wait for a free slot and a token from a bucket refilled at rate
+    per second, lowest priority value first, and none start before a
+    Retry-After deadline. After CIRCUIT_FAILURE_THRESHOLD consecutive
+    transport errors, 5xx or 429 responses the circuit opens and calls fail
+    at once; when it has been open long enough a single probe is let
+    through, closing the circuit on success and reopening it for twice as
+    long on failure. Commands never wait more than COMMAND_MAX_QUEUE_TIME
+    and fail with SmarthomesecRateLimitedError instead.
+    """
+
+    def __init__(
+        self,
+        rate: float = REQUEST_RATE,
+        burst: int = REQUEST_BURST,
+        concurrency: int = MAX_CONCURRENT_REQUESTS,
+    ) -> None:
+        """Initialize the governor."""
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._active = 0
+        self._queue: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._changed = asyncio.Condition()
+        self.retry_after_until = 0.0
+
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self._open_time = CIRCUIT_OPEN_TIME
+        self._opened_at = 0.0
+        self._probing = False
+
+        self.stats = {
+            "requests": 0,
+            "throttled": 0,
+            "rate_limited": 0,
+            "rejected": 0,
+            "trips": 0,
+        }
+
+    async def async_request(
+        self, priority: int, request: Callable[[], Awaitable[tuple[int, Any]]]
+    ) -> tuple[int, Any]:
+        """Run a call of the transport under the budget and the breaker."""
+        probe = self._check_circuit()
+        try:
+            await self._async_acquire_bounded(priority)
+        except BaseException:
+            if probe:
+                self._probing = False
+            raise
+
+        try:
+            try:
+                self.stats["requests"] += 1
+                status, body = await request()
+            finally:
+                await self._async_release()
+        except SmarthomesecRateLimitedError as ex:
+            self._rate_limited(ex.retry_after)
+            self._record(False, probe)
+            raise
+        except SmarthomesecAuthError:
+            # Refused credentials, the cloud itself answered fine
+            self._record(True, probe)
+            raise
+        except SmarthomesecApiError:
+            self._record(False, probe)
+            raise
+        except BaseException:
+            if probe:
+                self._probing = False
+            raise
+
+        self._record(status < 500, probe)
+        return status, body
+
+    def _check_circuit(self) -> bool:
+        """Return True if the call is the probe of a half-open circuit."""
+        if self.state == CIRCUIT_CLOSED:
+            return False
+        if self.state == CIRCUIT_OPEN and time.monotonic() - self._opened_at >= self._open_time:
+            self.state = CIRCUIT_HALF_OPEN
+        if self.state == CIRCUIT_HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.stats["rejected"] += 1
+        raise SmarthomesecCircuitOpenError("SmartHomeSec cloud is degraded, not calling it")
+
+    def _record(self, success: bool, probe: bool) -> None:
+        if probe:
+            self._probing = False
+        if success:
+            if self.state != CIRCUIT_CLOSED:
+                _LOGGER.info("SmartHomeSec cloud recovered")
+            self.state = CIRCUIT_CLOSED
+            self.failures = 0
+            self._open_time = CIRCUIT_OPEN_TIME
+            return
+
+        self.failures += 1
+        if self.state == CIRCUIT_HALF_OPEN:
+            self._open_time = min(self._open_time * 2, CIRCUIT_MAX_OPEN_TIME)
+            self._trip()
+        elif self.state == CIRCUIT_CLOSED and self.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            self._trip()
+
+    def _trip(self) -> None:
+        _LOGGER.warning(
+            "%s failed calls to SmartHomeSec, pausing for %ss", self.failures, self._open_time
+        )
+        self.state = CIRCUIT_OPEN
+        self._opened_at = time.monotonic()
+        self.stats["trips"] += 1
+
+    def _rate_limited(self, retry_after: float | None) -> None:
+        delay = DEFAULT_RETRY_AFTER if retry_after is None else retry_after
+        _LOGGER.warning("SmartHomeSec asked to slow down for %ss", delay)
+        self.retry_after_until = max(self.retry_after_until, time.monotonic() + delay)
+        self.stats["rate_limited"] += 1
+
+    def _try_grant(self, entry: tuple[int, int]) -> float | None:
+        """Grant the call if it may start.
+
+        Returns 0 once granted, the seconds until it might be granted, or
+        None to wait for another call to finish.
+        """
+        if self._queue[0] is not entry or self._active >= self.concurrency:
+            return None
+
+        now = time.monotonic()
+        if (blocked := self.retry_after_until - now) > 0:
+            return blocked
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        if self._tokens < 1:
+            self.stats["throttled"] += 1
+            return (1 - self._tokens) / self.rate
+
+        self._tokens -= 1
+        heapq.heappop(self._queue)
+        self._active += 1
+        # The next call in line may fit in another slot
+        self._changed.notify_all()
+        return 0
+
+    async def _async_acquire_bounded(self, priority: int) -> None:
+        """Acquire, failing fast rather than leaving a command hanging."""
+        if priority != PRIORITY_COMMAND:
+            await self._async_acquire(priority)
+            return
+
+        if (blocked := self.retry_after_until - time.monotonic()) > COMMAND_MAX_QUEUE_TIME:
+            self.stats["rejected"] += 1
+            raise SmarthomesecRateLimitedError(round(blocked, 1))
+        try:
+            async with asyncio.timeout(COMMAND_MAX_QUEUE_TIME):
+                await self._async_acquire(priority)
+        except TimeoutError:
+            self.stats["rejected"] += 1
+            raise SmarthomesecRateLimitedError(
+                max(round(self.retry_after_until - time.monotonic(), 1), 0.0) or None
+            ) from None
+
+    async def _async_acquire(self, priority: int) -> None:
+        entry = (priority, next(self._seq))
+        async with self._changed:
+            heapq.heappush(self._queue, entry)
+            try:
+                while (wait := self._try_grant(entry)) != 0:
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), wait)
+                    except TimeoutError:
+                        pass
+            except BaseException:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+                self._changed.notify_all()
+                raise
+
+    async def _async_release(self) -> None:
+        async with self._changed:
+            self._active -= 1
+            self._changed.notify_all()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the governor."""
+        return {
+            **self.stats,
+            "circuit": self.state,
+            "consecutive_failures": self.failures,
+            "queued": len(self._queue),
+            "tokens": round(self._tokens, 2),
+        }
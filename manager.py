@@ -0,0 +1,236 @@
+"""Domain-wide connection manager shared by all SmartHomeSec config entries."""
+
+from collections.abc import Callable
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .api import SmarthomesecApi
+from .auth import SmarthomesecAuth
+from .const import DOMAIN, DATA_MANAGER, VALIDATED_SESSION_MAX_AGE
+from .governor import RequestGovernor
+from .metrics import SmarthomesecMetrics
+from .storage import SmarthomesecAuthStore
+
+if TYPE_CHECKING:
+    from .ws_client import WSClient
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SmarthomesecAccount:
+    """Resources shared by every config entry logged into one account."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        username: str,
+        password: str,
+        api: SmarthomesecApi,
+        auth_store: SmarthomesecAuthStore,
+        governor: RequestGovernor,
+    ) -> None:
+        """Initialize the account."""
+        self.hass = hass
+        self.username = username
+        self.api = api
+        self.auth_store = auth_store
+        # Request budget and circuit breaker for this account, logins included
+        self.governor = governor
+        self.metrics = SmarthomesecMetrics()
+        self.auth = SmarthomesecAuth(
+            hass, api, auth_store, username, password, governor, self.metrics
+        )
+        self.wsc: WSClient | None = None
+        # panel/cycle body fetched by the config flow, served to the first refresh
+        self.initial_cycle: bytes | None = None
+        self._listeners: dict[str, Callable[[str, Any], None]] = {}
+
+    @property
+    def entry_ids(self) -> list[str]:
+        """Return the config entries using this account."""
+        return list(self._listeners)
+
+    @callback
+    def async_add_listener(self, entry_id: str, listener: Callable[[str, Any], None]) -> None:
+        """Register a push listener for a config entry."""
+        self._listeners[entry_id] = listener
+
+    @callback
+    def async_remove_listener(self, entry_id: str) -> None:
+        """Remove the push listener of a config entry."""
+        self._listeners.pop(entry_id, None)
+
+    @callback
+    def async_pop_initial_cycle(self) -> bytes | None:
+        """Return the panel/cycle body validated by the config flow, once."""
+        content, self.initial_cycle = self.initial_cycle, None
+        return content
+
+    @callback
+    def async_start_push(self, token: str) -> None:
+        """Start the push client unless one is already running."""
+        if self.wsc is not None:
+            return
+        # Imported on first use, setup does not wait for the push client
+        from .ws_client import WSClient
+
+        self.wsc = WSClient(self, token, self.api.session, self.api.ws_url)
+        self.wsc.start()
+
+    async def async_close(self) -> None:
+        """Release everything the account runs, waiting for the push socket to close."""
+        self._listeners.clear()
+        self.initial_cycle = None
+        self.auth.async_cancel()
+        wsc, self.wsc = self.wsc, None
+        if wsc is not None:
+            await wsc.async_close()
+
+    @property
+    def reconnects(self) -> int:
+        """Return how many connections of the push client followed an earlier one."""
+        return max(self.wsc.connections - 1, 0) if self.wsc is not None else 0
+
+    def callback(self, message, data):
+        """Fan push messages out to every entry of the account."""
+        self.metrics.record_push(message)
+        for listener in list(self._listeners.values()):
+            listener(message, data)
+
+
+class SmarthomesecConnectionManager:
+    """Own the HTTP pool, push sockets and request budgets of the domain.
+
+    Accounts are reference counted per config entry so several entries for
+    the same account share one push socket.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, base_url: str | None = None, ws_url: str | None = None
+    ) -> None:
+        """Initialize the manager.
+
+        base_url and ws_url point the integration at another cloud, such as
+        the local simulator used by the benchmarks.
+        """
+        self.hass = hass
+        self.base_url = base_url
+        self.ws_url = ws_url
+        self.api: SmarthomesecApi | None = None
+        self.auth_store = SmarthomesecAuthStore(hass)
+        self.accounts: dict[str, SmarthomesecAccount] = {}
+        self._entries: dict[str, str] = {}
+        # username -> request governor, kept across reloads so a Retry-After
+        # outlives the entry and the config flow shares it
+        self._governors: dict[str, RequestGovernor] = {}
+        # username -> (monotonic time, token, user id, panel/cycle body) from the config flow
+        self._validated: dict[str, tuple[float, str, str, bytes]] = {}
+
+    @callback
+    def async_get_api(self) -> SmarthomesecApi:
+        """Return the shared transport, creating it on first use."""
+        if self.api is None:
+            # A single keep-alive pool for every entry and the config flow
+            self.api = SmarthomesecApi(
+                async_create_clientsession(self.hass), self.base_url, self.ws_url
+            )
+        return self.api
+
+    @callback
+    def async_get_governor(self, username: str) -> RequestGovernor:
+        """Return the request governor of an account, even before its entry exists."""
+        if (governor := self._governors.get(username)) is None:
+            governor = self._governors[username] = RequestGovernor()
+        return governor
+
+    async def async_store_validated(
+        self, username: str, token: str, user_id: str, cycle: bytes
+    ) -> None:
+        """Keep a session validated by the config flow for the entry setup."""
+        await self.auth_store.async_set(username, token, user_id)
+        self._validated[username] = (time.monotonic(), token, user_id, cycle)
+
+    async def async_start_capture(self, path: str) -> None:
+        """Start capturing REST responses and push frames to a file.
+
+        An existing file is only appended to if it holds a capture.
+        """
+        from .capture import TrafficRecorder, can_append
+
+        if not await self.hass.async_add_executor_job(can_append, path):
+            raise HomeAssistantError(f"{path} exists and is not a SmartHomeSec capture")
+        await self.async_stop_capture()
+        self.async_get_api().recorder = TrafficRecorder(self.hass, path)
+        _LOGGER.info("Capturing SmartHomeSec traffic to %s", path)
+
+    async def async_stop_capture(self) -> int:
+        """Stop the running capture and return how many lines it recorded."""
+        if self.api is None or (recorder := self.api.recorder) is None:
+            return 0
+        self.api.recorder = None
+        await recorder.async_close()
+        _LOGGER.info("Captured %s lines to %s", recorder.lines, recorder.path)
+        return recorder.lines
+
+    @callback
+    def async_acquire(self, entry_id: str, username: str, password: str) -> SmarthomesecAccount:
+        """Return the account for a config entry, creating shared resources as needed."""
+        api = self.async_get_api()
+
+        account = self.accounts.get(username)
+        if account is None:
+            account = self.accounts[username] = SmarthomesecAccount(
+                self.hass, username, password, api, self.auth_store, self.async_get_governor(username)
+            )
+        else:
+            account.auth.password = password
+        if validated := self._validated.pop(username, None):
+            validated_at, token, user_id, cycle = validated
+            # The session is valid whatever its age, the snapshot only briefly
+            account.auth.async_set_session(token, user_id)
+            if time.monotonic() - validated_at < VALIDATED_SESSION_MAX_AGE:
+                account.initial_cycle = cycle
+        self._entries[entry_id] = username
+        return account
+
+    def is_in_use(self, username: str) -> bool:
+        """Return True if a loaded config entry uses the account."""
+        return username in self._entries.values()
+
+    async def async_release(self, entry_id: str) -> None:
+        """Drop a config entry's reference and free unused resources.
+
+        The HTTP pool is kept so a reload reuses its connections.
+        """
+        username = self._entries.pop(entry_id, None)
+        if username is None:
+            return
+
+        account = self.accounts[username]
+        account.async_remove_listener(entry_id)
+        if not self.is_in_use(username):
+            _LOGGER.debug("Releasing account %s", username)
+            del self.accounts[username]
+            await account.async_close()
+
+    async def async_close_api(self) -> None:
+        """Close the HTTP pool once no account needs it."""
+        if self.accounts or self.api is None:
+            return
+        await self.async_stop_capture()
+        api, self.api = self.api, None
+        await api.session.close()
+
+
+@callback
+def async_get_manager(hass: HomeAssistant) -> SmarthomesecConnectionManager:
+    """Return the domain connection manager."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_MANAGER not in domain_data:
+        domain_data[DATA_MANAGER] = SmarthomesecConnectionManager(hass)
+    return domain_data[DATA_MANAGER]
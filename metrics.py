@@ -0,0 +1,142 @@
+"""Lightweight performance instrumentation for the integration."""
+
+from bisect import bisect_left
+from collections import Counter
+import time
+from typing import Any
+
+# Upper bounds of the latency buckets, in milliseconds
+LATENCY_BUCKETS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+RATE_WINDOW = 60
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram."""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Add a sample."""
+        ms = seconds * 1000
+        self.buckets[bisect_left(LATENCY_BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the upper bucket bound holding the given fraction of samples."""
+        if not self.count:
+            return None
+        threshold = fraction * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= threshold:
+                return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else round(self.max, 1)
+        return round(self.max, 1)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a summary of the histogram."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 1) if self.count else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 1),
+            "buckets": dict(zip([*map(str, LATENCY_BUCKETS), "inf"], self.buckets)),
+        }
+
+
+class RateCounter:
+    """Count events per second over a sliding window."""
+
+    __slots__ = ("total", "_slots", "_stamps")
+
+    def __init__(self) -> None:
+        """Initialize the counter."""
+        self.total = 0
+        self._slots = [0] * RATE_WINDOW
+        self._stamps = [0] * RATE_WINDOW
+
+    def record(self) -> None:
+        """Count one event."""
+        second = int(time.monotonic())
+        index = second % RATE_WINDOW
+        if self._stamps[index] != second:
+            self._stamps[index] = second
+            self._slots[index] = 0
+        self._slots[index] += 1
+        self.total += 1
+
+    @property
+    def per_second(self) -> float:
+        """Return the average rate over the window."""
+        oldest = int(time.monotonic()) - RATE_WINDOW
+        recent = sum(
+            hits for hits, stamp in zip(self._slots, self._stamps) if stamp > oldest
+        )
+        return round(recent / RATE_WINDOW, 3)
+
+
+class SmarthomesecMetrics:
+    """Counters and latency histograms of one account."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.rest: dict[str, LatencyHistogram] = {}
+        self.rest_status: dict[str, Counter] = {}
+        self.rest_errors: Counter = Counter()
+        self.refresh = LatencyHistogram()
+        self.push: dict[str, RateCounter] = {}
+        self.connects = 0
+        self.disconnects = 0
+
+    def record_rest(self, endpoint: str, seconds: float, status: int | None) -> None:
+        """Record a REST call, status None meaning a transport error."""
+        self.rest.setdefault(endpoint, LatencyHistogram()).record(seconds)
+        if status is None:
+            self.rest_errors[endpoint] += 1
+        else:
+            self.rest_status.setdefault(endpoint, Counter())[status] += 1
+
+    def record_push(self, code: str) -> None:
+        """Record a push message or connection event."""
+        if code == "WebSocketConnect":
+            self.connects += 1
+        elif code == "WebSocketDisconnect":
+            self.disconnects += 1
+        self.push.setdefault(code, RateCounter()).record()
+
+    @property
+    def push_per_second(self) -> float:
+        """Return the Engine.IO message rate over the window."""
+        return round(
+            sum(rate.per_second for code, rate in self.push.items() if code[:1].isdigit()), 3
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return every metric as plain data."""
+        return {
+            "rest": {
+                endpoint: {
+                    **histogram.as_dict(),
+                    "status": dict(self.rest_status.get(endpoint, {})),
+                    "errors": self.rest_errors[endpoint],
+                }
+                for endpoint, histogram in self.rest.items()
+            },
+            "refresh": self.refresh.as_dict(),
+            "push": {
+                code: {"total": rate.total, "per_second": rate.per_second}
+                for code, rate in self.push.items()
+            },
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+        }
@@ -0,0 +1,142 @@
+"""Normalized device and area state built once per panel/cycle snapshot."""
+
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.components.alarm_control_panel import AlarmControlPanelState
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass
+
+from .const import TYPE_CLASS_BINARY_SENSOR, TYPE_TRANSLATION
+
+
+def _decode_open(raw: dict[str, Any]) -> bool | None:
+    status_open = raw.get("status_open")
+    if status_open:
+        return status_open[0] == "device_status.dc_open"
+    return None
+
+
+def _decode_motion(raw: dict[str, Any]) -> bool | None:
+    status_motion = raw.get("status_motion")
+    if status_motion:
+        return status_motion == "1"
+    return None
+
+
+def _decode_generic(raw: dict[str, Any]) -> bool | None:
+    is_on = _decode_open(raw)
+    if is_on is None:
+        is_on = _decode_motion(raw)
+    return is_on
+
+
+# device_status fields read by the decoders, kept across partial updates
+STATUS_KEYS = ("status_open", "status_motion")
+
+# Device type -> decoder of the on/off state, extends TYPE_CLASS_BINARY_SENSOR
+DEVICE_DECODERS: dict[str, Callable[[dict[str, Any]], bool | None]] = {
+    "device_type.door_contact": _decode_open,
+    "device_type.pir": _decode_motion,
+}
+
+ALARM_MODE_STATES: dict[str, AlarmControlPanelState] = {
+    "disarm": AlarmControlPanelState.DISARMED,
+    "arm": AlarmControlPanelState.ARMED_AWAY,
+    "home": AlarmControlPanelState.ARMED_HOME,
+    "triggered": AlarmControlPanelState.TRIGGERED,
+}
+
+
+class DeviceState:
+    """Decoded state of one panel device.
+
+    Only the decoded fields and the status values the decoders read are
+    kept, so a large panel does not hold every raw device_status entry.
+    """
+
+    __slots__ = ("device_id", "name", "type", "type_name", "area", "device_class", "is_on", "status")
+
+    def __init__(self, raw: dict[str, Any]) -> None:
+        """Decode a device_status entry."""
+        device_type = raw.get("type")
+        self.device_id: str = raw["device_id"]
+        self.name: str = raw.get("name", self.device_id)
+        self.type: str = device_type
+        self.type_name: str = TYPE_TRANSLATION.get(device_type, device_type)
+        self.area: str | None = str(raw["area"]) if raw.get("area") is not None else None
+        self.device_class: BinarySensorDeviceClass | None = TYPE_CLASS_BINARY_SENSOR.get(device_type)
+        self.status: dict[str, Any] = {key: raw[key] for key in STATUS_KEYS if key in raw}
+        self.is_on: bool | None = DEVICE_DECODERS.get(device_type, _decode_generic)(self.status)
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, DeviceState)
+            and self.device_id == other.device_id
+            and self.name == other.name
+            and self.type == other.type
+            and self.area == other.area
+            and self.is_on == other.is_on
+        )
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"DeviceState({self.device_id!r}, {self.type_name!r}, is_on={self.is_on})"
+
+    def merge(self, update: dict[str, Any]) -> "DeviceState":
+        """Return a new state with a partial update applied."""
+        raw = {"device_id": self.device_id, "name": self.name, "type": self.type, **self.status}
+        if self.area is not None:
+            raw["area"] = self.area
+        return DeviceState({**raw, **update})
+
+
+class AreaState:
+    """Decoded state of one alarm area."""
+
+    __slots__ = ("area", "mode", "alarm_state")
+
+    def __init__(self, raw: dict[str, Any]) -> None:
+        """Decode a model entry."""
+        self.area: str = str(raw["area"])
+        self.mode: str | None = raw.get("mode")
+        self.alarm_state: AlarmControlPanelState | None = ALARM_MODE_STATES.get(self.mode)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, AreaState) and self.area == other.area and self.mode == other.mode
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"AreaState({self.area!r}, {self.mode!r})"
+
+    def merge(self, update: dict[str, Any]) -> "AreaState":
+        """Return a new state with a partial update applied."""
+        return AreaState({"area": self.area, "mode": self.mode, **update})
+
+
+def build_indexes(devices: dict[str, DeviceState]) -> dict[str, dict[str, list[str]]]:
+    """Index device ids by device type."""
+    by_type: dict[str, list[str]] = {}
+    for device_id, device in devices.items():
+        by_type.setdefault(device.type, []).append(device_id)
+    return {"by_type": by_type}
+
+
+def build_snapshot(status: dict[str, Any]) -> dict[str, dict]:
+    """Decode the data object of a panel/cycle response.
+
+    Devices are keyed by device_id and areas by area id, with a type
+    index alongside so lookups never scan the device list.
+    """
+    devices = {}
+    for device in status["device_status"]:
+        state = DeviceState(device)
+        devices[state.device_id] = state
+
+    alarms = {}
+    for alarm in status["model"]:
+        state = AreaState(alarm)
+        alarms[state.area] = state
+
+    return {"devices": devices, "alarms": alarms, **build_indexes(devices)}
@@ -0,0 +1,117 @@
+"""Coalescing, single-flight refresh scheduler for push-triggered refreshes."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import REFRESH_COALESCE_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RefreshScheduler:
+    """Turn bursts of refresh requests into as few API calls as possible.
+
+    Requests arriving within the coalescing window share one refresh. While
+    a refresh is in flight further requests only mark one trailing refresh,
+    which runs once the current one completes.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        refresh: Callable[[], Awaitable[Any]],
+        window: float = REFRESH_COALESCE_WINDOW,
+    ) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._refresh = refresh
+        self.window = window
+
+        self._timer: asyncio.TimerHandle | None = None
+        self._task: asyncio.Task | None = None
+        self._trailing = False
+
+        self._burst_start: float | None = None
+        self._burst_requests = 0
+        self._burst_refreshes = 0
+
+        self.last_burst: dict[str, Any] = {}
+        self.stats = {
+            "requests": 0,
+            "refreshes": 0,
+            "bursts": 0,
+            "coalesced": 0,
+        }
+
+    @property
+    def in_flight(self) -> bool:
+        """Return True while a refresh is running."""
+        return self._task is not None
+
+    @callback
+    def async_schedule(self) -> None:
+        """Request a refresh."""
+        self.stats["requests"] += 1
+        if self._burst_start is None:
+            self._burst_start = time.monotonic()
+            self._burst_requests = 0
+            self._burst_refreshes = 0
+        self._burst_requests += 1
+
+        if self._task is not None:
+            self._trailing = True
+            return
+        if self._timer is None:
+            self._timer = self.hass.loop.call_later(self.window, self._async_start)
+
+    @callback
+    def _async_start(self) -> None:
+        self._timer = None
+        self._task = self.hass.async_create_background_task(
+            self._async_run(), "smarthomesec refresh"
+        )
+
+    async def _async_run(self) -> None:
+        try:
+            while True:
+                self._trailing = False
+                self._burst_refreshes += 1
+                self.stats["refreshes"] += 1
+                try:
+                    await self._refresh()
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Scheduled refresh failed")
+                if not self._trailing:
+                    break
+        finally:
+            self._task = None
+            self._end_burst()
+
+    @callback
+    def _end_burst(self) -> None:
+        if self._burst_start is None:
+            return
+        self.last_burst = {
+            "requests": self._burst_requests,
+            "refreshes": self._burst_refreshes,
+            "duration": round(time.monotonic() - self._burst_start, 3),
+        }
+        self.stats["bursts"] += 1
+        self.stats["coalesced"] += self._burst_requests - self._burst_refreshes
+        self._burst_start = None
+        _LOGGER.debug("Refresh burst: %s", self.last_burst)
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel any pending or running refresh."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._task is not None:
+            self._task.cancel()
+        self._trailing = False
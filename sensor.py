@@ -0,0 +1,126 @@
+"""Diagnostic sensors exposing SmartHomeSec performance metrics."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+import logging
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from . import SmarthomesecCoordinator
+from .const import DOMAIN, INTEGRATION_TITLE
+from .metrics import SmarthomesecMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+# Metrics are read from memory, no I/O involved
+SCAN_INTERVAL = timedelta(seconds=60)
+
+
+@dataclass(frozen=True, kw_only=True)
+class SmarthomesecMetricDescription(SensorEntityDescription):
+    """Describe a metric sensor."""
+
+    value_fn: Callable[[SmarthomesecMetrics, SmarthomesecCoordinator], float | int | None]
+
+
+def _rest_p95(metrics: SmarthomesecMetrics, coord: SmarthomesecCoordinator) -> float | None:
+    histogram = metrics.rest.get("panel/cycle")
+    return histogram.percentile(0.95) if histogram is not None else None
+
+
+METRIC_SENSORS: tuple[SmarthomesecMetricDescription, ...] = (
+    SmarthomesecMetricDescription(
+        key="rest_latency_p95",
+        name="Panel cycle latency p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_rest_p95,
+    ),
+    SmarthomesecMetricDescription(
+        key="refresh_latency_p95",
+        name="Refresh duration p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics, coord: metrics.refresh.percentile(0.95),
+    ),
+    SmarthomesecMetricDescription(
+        key="push_rate",
+        name="Push messages per second",
+        native_unit_of_measurement="msg/s",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics, coord: metrics.push_per_second,
+    ),
+    SmarthomesecMetricDescription(
+        key="reconnects",
+        name="Push reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics, coord: coord.account.reconnects,
+    ),
+    SmarthomesecMetricDescription(
+        key="logins",
+        name="Logins",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics, coord: coord.account.auth.stats["logins"],
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up the diagnostic sensors of a Smarthomesec entry."""
+    coord = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
+    # Shared by the entries of the same account
+    metrics = coord.account.metrics
+
+    async_add_entities(
+        SmarthomesecMetricSensor(coord, metrics, description, config_entry)
+        for description in METRIC_SENSORS
+    )
+
+
+class SmarthomesecMetricSensor(SensorEntity):
+    """A performance metric of the integration, disabled by default."""
+
+    entity_description: SmarthomesecMetricDescription
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coord: SmarthomesecCoordinator,
+        metrics: SmarthomesecMetrics,
+        description: SmarthomesecMetricDescription,
+        config_entry: ConfigEntry,
+    ) -> None:
+        """Initialize the metric sensor."""
+        self._coord = coord
+        self._metrics = metrics
+        self.entity_description = description
+        self._attr_unique_id = f"{config_entry.entry_id}_{description.key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, config_entry.entry_id)},
+            name=config_entry.title,
+            manufacturer=INTEGRATION_TITLE,
+        )
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the current value of the metric."""
+        return self.entity_description.value_fn(self._metrics, self._coord)
@@ -0,0 +1,58 @@
+"""Persistent cache of SmartHomeSec auth sessions."""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.auth"
+STORAGE_VERSION = 1
+SAVE_DELAY = 5
+
+
+class SmarthomesecAuthStore:
+    """Keep tokens across restarts so setup can skip auth/login.
+
+    Sessions are keyed by account name since the config flow validates
+    credentials before a config entry id exists.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, dict[str, Any]]] = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._sessions: dict[str, dict[str, Any]] | None = None
+        self._load_lock = asyncio.Lock()
+
+    async def async_load(self) -> None:
+        """Load cached sessions once."""
+        async with self._load_lock:
+            if self._sessions is None:
+                self._sessions = await self._store.async_load() or {}
+
+    async def async_get(self, username: str) -> dict[str, Any] | None:
+        """Return the cached session of an account."""
+        await self.async_load()
+        return self._sessions.get(username)
+
+    async def async_set(self, username: str, token: str, user_id: str) -> None:
+        """Cache a freshly obtained session."""
+        await self.async_load()
+        self._sessions[username] = {
+            "token": token,
+            "user_id": user_id,
+            "issued": time.time(),
+        }
+        self._store.async_delay_save(lambda: self._sessions, SAVE_DELAY)
+
+    async def async_remove(self, username: str) -> None:
+        """Forget the session of an account."""
+        await self.async_load()
+        if self._sessions.pop(username, None) is not None:
+            self._store.async_delay_save(lambda: self._sessions, SAVE_DELAY)
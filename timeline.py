@@ -0,0 +1,132 @@
+"""Bounded in-memory timeline of device and area transitions."""
+
+from collections import deque
+from collections.abc import Iterator
+import logging
+import time
+from typing import Any, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, TIMELINE_SAVE_DELAY, TIMELINE_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+KIND_DEVICE = "d"
+KIND_AREA = "a"
+
+
+class Transition(NamedTuple):
+    """One decoded state change.
+
+    Devices carry their on/off state, areas their alarm mode.
+    """
+
+    timestamp: float
+    kind: str
+    item_id: str
+    old: bool | str | None
+    new: bool | str | None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the transition as plain data."""
+        return self._asdict()
+
+
+class EventTimeline:
+    """Keep the last TIMELINE_SIZE transitions seen by a coordinator.
+
+    With an entry id the buffer is also saved, compacted to plain lists,
+    a while after the last change so it survives restarts.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str | None = None) -> None:
+        """Initialize the timeline."""
+        self._events: deque[Transition] = deque(maxlen=TIMELINE_SIZE)
+        self._store: Store[list[list[Any]]] | None = None
+        if entry_id is not None:
+            self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.timeline.{entry_id}")
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    async def async_load(self) -> None:
+        """Restore the saved transitions."""
+        if self._store is None:
+            return
+        for row in await self._store.async_load() or ():
+            try:
+                self._events.append(Transition(*row))
+            except TypeError:
+                _LOGGER.debug("Dropping invalid timeline row %s", row)
+
+    async def async_save(self) -> None:
+        """Write the transitions now instead of after the save delay."""
+        if self._store is not None:
+            await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Delete the saved transitions."""
+        if self._store is not None:
+            await self._store.async_remove()
+
+    @callback
+    def async_record(
+        self,
+        old: dict[str, dict] | None,
+        new: dict[str, dict],
+        changed_devices: set[str],
+        changed_alarms: set[str],
+    ) -> None:
+        """Record the decoded transitions between two snapshots."""
+        if old is None:
+            # Nothing to compare the first snapshot with
+            return
+
+        now = time.time()
+        count = len(self._events)
+        for device_id in changed_devices:
+            before = old["devices"].get(device_id)
+            after = new["devices"].get(device_id)
+            if before is None or after is None or before.is_on == after.is_on:
+                continue
+            self._events.append(Transition(now, KIND_DEVICE, device_id, before.is_on, after.is_on))
+        for area_id in changed_alarms:
+            before = old["alarms"].get(area_id)
+            after = new["alarms"].get(area_id)
+            if before is None or after is None or before.mode == after.mode:
+                continue
+            self._events.append(Transition(now, KIND_AREA, area_id, before.mode, after.mode))
+
+        if self._store is not None and len(self._events) != count:
+            self._store.async_delay_save(self._data_to_save, TIMELINE_SAVE_DELAY)
+
+    def _data_to_save(self) -> list[list[Any]]:
+        return [list(event) for event in self._events]
+
+    def query(
+        self,
+        kind: str | None = None,
+        item_id: str | None = None,
+        state: bool | str | None = None,
+        since: float | None = None,
+        limit: int | None = None,
+    ) -> Iterator[Transition]:
+        """Yield matching transitions, newest first."""
+        for event in reversed(self._events):
+            if since is not None and event.timestamp < since:
+                return
+            if limit is not None and limit <= 0:
+                return
+            if kind is not None and event.kind != kind:
+                continue
+            if item_id is not None and event.item_id != item_id:
+                continue
+            if state is not None and event.new != state:
+                continue
+            if limit is not None:
+                limit -= 1
+            yield event
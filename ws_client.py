@@ -2,135 +2,280 @@
 
 #################################################################################################
 
+import asyncio
+from dataclasses import dataclass
 import json
 import logging
-import re
-import threading
-import ssl
-import certifi
+import random
+from typing import Any
 
-import websocket
+import aiohttp
 
-from custom_components.smarthomesec.const import API_BASEHOST
+from custom_components.smarthomesec.const import (
+    API_BASEHOST,
+    PUSH_RECONNECT_MIN_DELAY,
+    PUSH_RECONNECT_MAX_DELAY,
+)
 
 ##################################################################################################
 
 LOG = logging.getLogger(__name__)
 
+# Used until the server sends its Engine.IO handshake
+DEFAULT_PING_INTERVAL = 25
+DEFAULT_PING_TIMEOUT = 20
+
 ##################################################################################################
 
 
-class WSClient(threading.Thread):
-    global_wsc = None
-    global_stop = False
+@dataclass(slots=True)
+class PushEvent:
+    """A decoded Socket.IO event ("42" packet)."""
 
-    def __init__(self, client, token):
-        LOG.debug("WSClient initializing...")
+    name: str
+    data: Any
+    raw: str
 
-        self.client = client
-        self.token = token
 
-        self.keepalive = None
-        self.wsc = None
-        self.stop = False
+def split_packet(message: str) -> tuple[str, str]:
+    """Split an Engine.IO frame into its packet code and payload.
 
-        threading.Thread.__init__(self)
+    Engine.IO messages ("4") carry a second Socket.IO digit, so "42[...]"
+    yields ("42", "[...]") while "3probe" yields ("3", "probe").
+    """
+    if not message:
+        return "", ""
+    if message[0] == "4" and len(message) > 1 and message[1].isdigit():
+        return message[:2], message[2:]
+    return message[:1], message[1:]
 
-    def send(self, code, data=""):
-        if self.wsc is None:
-            raise ValueError("The websocket client is not started.")
 
-        self.wsc.send(code + data)
+def reconnect_delay(failures: int) -> float:
+    """Return a capped exponential backoff with full jitter on the upper half."""
+    ceiling = min(PUSH_RECONNECT_MIN_DELAY * 2 ** failures, PUSH_RECONNECT_MAX_DELAY)
+    return random.uniform(ceiling / 2, ceiling)
 
-    def run(self):
-        wsc_url = (
-            f"wss://{API_BASEHOST}/ws/socket.io/?token=%s&transport=websocket"
-            % (self.token)
-        )
 
-        LOG.debug("Websocket url: %s", wsc_url)
+def decode_event(content: str) -> PushEvent | None:
+    """Decode the payload of a "42" packet, or None if it is not an event."""
+    # Skip an optional ack id in front of the JSON array
+    start = content.find("[")
+    if start < 0:
+        return None
+    try:
+        packet = json.loads(content[start:])
+    except ValueError:
+        return None
+    if not isinstance(packet, list) or not packet or not isinstance(packet[0], str):
+        return None
+    data = packet[1] if len(packet) == 2 else packet[1:]
+    return PushEvent(packet[0], data, content)
 
-        self.wsc = websocket.WebSocketApp(
-            wsc_url,
-            on_message=lambda ws, message: self.on_message(ws, message),
-            on_error=lambda ws, error: self.on_error(ws, error),
-            on_ping=lambda ws, message: self.on_ping(ws, message),
-            on_pong=lambda ws, message: self.on_pong(ws, message),
-        )
-        self.wsc.on_open = lambda ws: self.on_open(ws)
 
-        if self.global_wsc is not None:
-            self.global_wsc.close()
-        self.global_wsc = self.wsc
+class WSClient:
+    """Engine.IO/Socket.IO push client running as a task on the event loop."""
 
-        while not self.stop and not self.global_stop:
-            self.wsc.run_forever(ping_interval=10, sslopt={"ca_certs": certifi.where()})
+    def __init__(self, client, token, session: aiohttp.ClientSession, url: str | None = None):
+        LOG.debug("WSClient initializing...")
 
-            if not self.stop:
-                break
+        self.client = client
+        self.token = token
+        self.session = session
+        self.url = url or f"wss://{API_BASEHOST}/ws/socket.io/"
 
-        LOG.debug("---<[ websocket ]")
-        self.client.callback("WebSocketDisconnect", None)
+        self.wsc: aiohttp.ClientWebSocketResponse | None = None
+        self.stop = False
+        self.sid = None
+        self.ping_interval = DEFAULT_PING_INTERVAL
+        self.ping_timeout = DEFAULT_PING_TIMEOUT
+        # Engine.IO v4 servers ping the client, v3 servers expect client pings
+        self.server_pings = False
+        self.last_seen = None
+        self.last_pong = None
+        # Successful connections, and failed attempts since the last handshake
+        self.connections = 0
+        self.failures = 0
+
+        self._task: asyncio.Task | None = None
+        self._ping_task: asyncio.Task | None = None
+
+    def start(self):
+        """Start the client in the background."""
+        self._task = self.client.hass.async_create_background_task(
+            self._run(), "smarthomesec websocket"
+        )
 
-    def on_error(self, ws, error):
-        LOG.error(error)
-        self.client.callback("WebSocketError", error)
+    async def send(self, code, data=""):
+        if self.wsc is None:
+            raise ValueError("The websocket client is not started.")
 
-    def on_open(self, ws):
-        LOG.debug("--->[ websocket ]")
-        self.client.callback("WebSocketConnect", None)
+        await self.wsc.send_str(code + data)
+
+    async def _run(self):
+        """Keep the socket connected until the client is stopped."""
+        while not self.stop:
+            self.sid = None
+            try:
+                await self._connect()
+            except Exception:  # pylint: disable=broad-except
+                # Keep reconnecting whatever went wrong, CancelledError is
+                # not an Exception and still stops the supervisor
+                LOG.exception("Unexpected error on the push connection")
+            if self.stop:
+                break
 
-    def on_ping(self, ws, message):
-        LOG.debug("--->[ websocket ] Got a ping! A pong reply has already been automatically sent.")
+            if self.sid is not None:
+                # The last connection was healthy, start the backoff over
+                self.failures = 0
+            delay = reconnect_delay(self.failures)
+            self.failures += 1
+            LOG.debug("Reconnecting in %.1fs (attempt %s)", delay, self.failures)
+            await asyncio.sleep(delay)
 
-    def on_pong(self, ws, message):
-        LOG.debug("--->[ websocket ] Got a pong! Sending keepalive")
-        self.send("2")
+    async def _connect(self):
+        # Pick up tokens renewed by the account since the last attempt
+        self.token = self.client.auth.token or self.token
+        wsc_url = f"{self.url}?token={self.token}&transport=websocket"
 
-    def on_message(self, ws, message):
-        re_split = re.search("^(\\d+)(.*)$", message)
-        code = re_split.group(1)
-        content = re_split.group(2)
+        LOG.debug("Websocket url: %s", wsc_url)
 
-        LOG.debug("Received: code: %s; message: %s", code, content)
-        self.client.callback(code, content)
+        try:
+            async with self.session.ws_connect(wsc_url, autoping=True) as ws:
+                self.wsc = ws
+                self.connections += 1
+                self.on_open()
+                await self._receive_loop(ws)
+        except asyncio.CancelledError:
+            raise
+        except aiohttp.WSServerHandshakeError as error:
+            self.on_error(error)
+            if error.status in (401, 403):
+                await self._async_renew_token()
+        except (aiohttp.ClientError, TimeoutError) as error:
+            self.on_error(error)
+        finally:
+            self.wsc = None
+            if self._ping_task is not None:
+                self._ping_task.cancel()
+                self._ping_task = None
+            LOG.debug("---<[ websocket ]")
+            self._dispatch("WebSocketDisconnect", None)
+
+    async def _async_renew_token(self):
+        """Subscribe again with a fresh token after the server rejected ours."""
+        try:
+            await self.client.auth.async_login(stale_token=self.token)
+        except Exception as ex:  # pylint: disable=broad-except
+            LOG.warning("Failed to renew the push token: %s", ex)
+            return
+        self.token = self.client.auth.token
+
+    async def _receive_loop(self, ws: aiohttp.ClientWebSocketResponse):
+        while not self.stop:
+            try:
+                msg = await ws.receive(timeout=self.ping_interval + self.ping_timeout)
+            except TimeoutError:
+                LOG.warning("No Engine.IO traffic for %ss, closing", self.ping_interval + self.ping_timeout)
+                return
+
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                await self.on_message(msg.data)
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                self.on_error(ws.exception())
+                return
+            elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSED):
+                return
+
+    async def _ping_loop(self):
+        loop = asyncio.get_running_loop()
+        while (ws := self.wsc) is not None:
+            await asyncio.sleep(self.ping_interval)
+            LOG.debug("--->[ websocket ] Sending keepalive")
+            sent = loop.time()
+            await self.send("2")
+            await asyncio.sleep(self.ping_timeout)
+            if self.last_pong is None or self.last_pong < sent:
+                # The socket is open but the server stopped answering
+                LOG.warning("No Engine.IO pong within %ss, closing", self.ping_timeout)
+                await ws.close()
+                return
+
+    def _dispatch(self, code, data):
+        """Hand a message to the account, a failing handler keeps the socket open."""
+        try:
+            self.client.callback(code, data)
+        except Exception:  # pylint: disable=broad-except
+            LOG.exception("Error handling push message %s", code)
+
+    def on_error(self, error):
+        LOG.error(error)
+        self._dispatch("WebSocketError", error)
 
-        return
+    def on_open(self):
+        LOG.debug("--->[ websocket ]")
+        self._dispatch("WebSocketConnect", None)
 
-        message = json.loads(message)
+    def on_handshake(self, content):
+        try:
+            handshake = json.loads(content)
+        except ValueError:
+            LOG.warning("Invalid Engine.IO handshake: %s", content)
+            return
 
-        data = message.get("Data", {})
+        self.sid = handshake.get("sid")
+        self.ping_interval = handshake.get("pingInterval", DEFAULT_PING_INTERVAL * 1000) / 1000
+        self.ping_timeout = handshake.get("pingTimeout", DEFAULT_PING_TIMEOUT * 1000) / 1000
+        self.server_pings = "maxPayload" in handshake
 
-        if message["MessageType"] == "ForceKeepAlive":
-            self.send("KeepAlive")
-            if self.keepalive is not None:
-                self.keepalive.stop()
-            self.keepalive = KeepAlive(data, self)
-            self.keepalive.start()
-            LOG.debug("ForceKeepAlive received from server.")
-            return
-        elif message["MessageType"] == "KeepAlive":
-            LOG.debug("KeepAlive received from server.")
-            return
+        LOG.debug(
+            "Handshake: sid %s, ping interval %ss, ping timeout %ss",
+            self.sid, self.ping_interval, self.ping_timeout,
+        )
+        if not self.server_pings and self._ping_task is None:
+            self._ping_task = self.client.hass.async_create_background_task(
+                self._ping_loop(), "smarthomesec websocket ping"
+            )
+
+    async def on_message(self, message):
+        self.last_seen = asyncio.get_running_loop().time()
+        if (recorder := self.client.api.recorder) is not None:
+            recorder.record_frame(message)
+        code, content = split_packet(message)
 
-        if data is None:
-            data = {}
-        elif not isinstance(data, dict):
-            data = {"value": data}
+        LOG.debug("Received: code: %s; message: %s", code, content)
 
-        if not self.client.config.data["app.default"]:
-            data["ServerId"] = self.client.auth.server_id
+        if code == "0":
+            self.on_handshake(content)
+        elif code == "2":
+            await self.send("3")
+        elif code == "3":
+            self.last_pong = self.last_seen
+        elif code == "42":
+            event = decode_event(content)
+            if event is None:
+                LOG.warning("Undecodable event: %s", content)
+            self._dispatch(code, event)
+            return
 
-        self.client.callback(message["MessageType"], data)
+        self._dispatch(code, content)
 
     def stop_client(self):
         self.stop = True
 
-        if self.keepalive is not None:
-            self.keepalive.stop()
-
-        if self.wsc is not None:
-            self.wsc.close()
-
-        self.global_stop = True
-        self.global_wsc = None
+        if self._ping_task is not None:
+            self._ping_task.cancel()
+            self._ping_task = None
+
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        self._task = None
+
+    async def async_close(self):
+        """Stop the client and wait until its socket is closed."""
+        task = self._task
+        self.stop_client()
+        if task is not None and task is not asyncio.current_task():
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass